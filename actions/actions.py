@@ -7,7 +7,8 @@
 from typing import Any, Text, Dict, List
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
-import random
+
+from actions.knowledge_base import knowledge_base, detect_script_language
 
 
 class ActionHealthAdvice(Action):
@@ -23,32 +24,17 @@ class ActionHealthAdvice(Action):
         # Get the latest intent
         intent = tracker.latest_message['intent']['name']
 
-        # Health advice database
-        health_advice = {
-            "ask_fever": [
-                "बुखार के दौरान आराम बहुत जरूरी है। पानी खूब पिएं।",
-                "ଜ୍ବର ସମୟରେ ବିଶ୍ରାମ ନିଅନ୍ତୁ ଏବଂ ପାଣି ପିଅନ୍ତୁ।",
-                "For fever, rest is crucial. Drink plenty of fluids and monitor temperature."
-            ],
-            "ask_headache": [
-                "सिरदर्द के लिए आराम और ठंडी पट्टी सहायक होती है।",
-                "ମାଥା ବଥା ପାଇଁ ବିଶ୍ରାମ ଓ ଠଣ୍ଡା ସେକ ସାହାଯ୍ୟକାରୀ।",
-                "For headache, rest in a dark room and apply cold compress."
-            ],
-            "ask_pregnancy_care": [
-                "गर्भावस्था में नियमित जांच और पौष्टिक आहार जरूरी है।",
-                "ଗର୍ଭାବସ୍ଥାରେ ନିୟମିତ ଯାଞ୍ଚ ଓ ପୁଷ୍ଟିକର ଖାଦ୍ୟ ଆବଶ୍ୟକ।",
-                "During pregnancy, regular checkups and nutritious diet are essential."
-            ]
-        }
-
-        # Get random advice for the intent
-        if intent in health_advice:
-            advice = random.choice(health_advice[intent])
-            dispatcher.utter_message(text=advice)
-        else:
-            dispatcher.utter_message(
-                text="Please ask me about specific health concerns like fever, headache, pregnancy care, etc.")
+        # Answer in the user's language: the API passes it as message
+        # metadata, otherwise guess from the script of the message
+        metadata = tracker.latest_message.get('metadata') or {}
+        language = metadata.get('language') or detect_script_language(
+            tracker.latest_message.get('text'))
+
+        advice = knowledge_base.lookup(
+            intent, language,
+            symptom=tracker.get_slot('symptom'),
+            age=tracker.get_slot('age'))
+        dispatcher.utter_message(text=advice or knowledge_base.default_reply(language))
 
         return []
 
@@ -0,0 +1,152 @@
+"""
+In-memory health advice knowledge base for the custom actions.
+
+Advice is loaded once when the action server starts, from
+actions/health_advice.json and (when the app database is reachable) the
+HealthContent table, and indexed by (intent, language, entity) so each
+lookup is a dictionary access. Edits to the JSON file are picked up without
+restarting the action server: lookups check the file's modification time
+every few seconds and reload when it changed.
+"""
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+KB_PATH = os.getenv(
+    "KB_PATH", os.path.join(os.path.dirname(__file__), "health_advice.json"))
+KB_INCLUDE_DB = os.getenv("KB_INCLUDE_DB", "true").lower() in ("1", "true", "yes")
+KB_RELOAD_INTERVAL = float(os.getenv("KB_RELOAD_INTERVAL", "5"))
+
+DEFAULT_LANGUAGE = "en"
+DEFAULT_ENTITY = "default"
+
+
+def detect_script_language(text: str) -> Optional[str]:
+    """Guess "or" or "hi" from the script of text; None for Latin text"""
+    for char in text or "":
+        if "\u0b00" <= char <= "\u0b7f":
+            return "or"
+        if "\u0900" <= char <= "\u097f":
+            return "hi"
+    return None
+
+
+def age_group(age) -> Optional[str]:
+    try:
+        age = float(age)
+    except (TypeError, ValueError):
+        return None
+    if age < 12:
+        return "child"
+    if age >= 60:
+        return "elderly"
+    return "adult"
+
+
+def _load_db_content(topic_intents: Dict[str, str]) -> Dict[Tuple[str, str, str], str]:
+    """HealthContent rows keyed like the JSON advice; empty if unavailable"""
+    try:
+        from database import SessionLocal, HealthContent
+    except ImportError:
+        return {}
+
+    entries = {}
+    try:
+        db = SessionLocal()
+        try:
+            for row in db.query(HealthContent).order_by(HealthContent.id.desc()):
+                intent = topic_intents.get(row.topic, row.topic)
+                entries[(intent, row.language, DEFAULT_ENTITY)] = row.content
+        finally:
+            db.close()
+    except Exception as e:
+        print(f"Knowledge base: skipping HealthContent ({e})")
+        return {}
+    return entries
+
+
+class KnowledgeBase:
+    """Health advice indexed by (intent, language, entity)"""
+
+    def __init__(self, path: str = KB_PATH, include_db: bool = KB_INCLUDE_DB,
+                 reload_interval: float = KB_RELOAD_INTERVAL):
+        self.path = path
+        self.include_db = include_db
+        self.reload_interval = reload_interval
+        self._index: Dict[Tuple[str, str, str], object] = {}
+        self._default: Dict[str, str] = {}
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        """Rebuild the index from the data file and database"""
+        mtime = os.path.getmtime(self.path)
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        index = {}
+        for intent, variants in data.get("advice", {}).items():
+            for entity, replies in variants.items():
+                for language, reply in replies.items():
+                    index[(intent, language, entity)] = reply
+        if self.include_db:
+            # Content edited in the database takes precedence
+            index.update(_load_db_content(data.get("topic_intents", {})))
+
+        # Swap in the new index in one step so concurrent lookups never see
+        # a half-built one
+        self._index = index
+        self._default = data.get("default", {})
+        self._mtime = mtime
+        self._checked_at = time.monotonic()
+
+    def maybe_reload(self):
+        """Reload if the data file changed, checking at most every interval"""
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.reload_interval:
+                return
+            self._checked_at = now
+            try:
+                if os.path.getmtime(self.path) != self._mtime:
+                    self.reload()
+            except (OSError, ValueError) as e:
+                # Keep serving the previous content if the file is mid-edit
+                print(f"Knowledge base: reload failed ({e})")
+
+    def lookup(self, intent: str, language: Optional[str] = None,
+               symptom: Optional[str] = None, age=None) -> Optional[str]:
+        """Most specific advice for intent in language, or None.
+
+        Prefers the user's language over entity-specific advice in another
+        language, and falls back to English.
+        """
+        self.maybe_reload()
+        entities = []
+        if symptom:
+            entities.append(f"symptom:{str(symptom).lower()}")
+        group = age_group(age)
+        if group:
+            entities.append(f"age:{group}")
+        entities.append(DEFAULT_ENTITY)
+
+        index = self._index
+        for lang in dict.fromkeys([language or DEFAULT_LANGUAGE, DEFAULT_LANGUAGE]):
+            for entity in entities:
+                reply = index.get((intent, lang, entity))
+                if reply:
+                    return random.choice(reply) if isinstance(reply, list) else reply
+        return None
+
+    def default_reply(self, language: Optional[str] = None) -> str:
+        return self._default.get(language) or self._default.get(DEFAULT_LANGUAGE, "")
+
+
+knowledge_base = KnowledgeBase()
@@ -0,0 +1,137 @@
+"""
+Incrementally maintained interaction statistics.
+
+The interaction log writer adds the counts for every batch it inserts to the
+interaction_stats summary table, in the same transaction, so /stats reads a
+few hundred summary rows instead of scanning user_interactions.
+
+Recompute the summary from the raw log (hot table plus retention archive) with:
+    python analytics.py rebuild
+"""
+import itertools
+import sys
+from collections import Counter
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, InteractionStat, UserInteraction, init_db
+
+HOURLY_BUCKETS = 24
+UNKNOWN = "unknown"
+
+
+def hour_bucket(timestamp) -> str:
+    return timestamp.strftime("%Y-%m-%dT%H:00")
+
+
+def aggregate(rows: Iterable[Tuple[str, str, object]]) -> Counter:
+    """Count (language, intent, timestamp) tuples per (dimension, bucket)"""
+    counts = Counter()
+    for language, intent, timestamp in rows:
+        counts[("total", "all")] += 1
+        counts[("language", language or UNKNOWN)] += 1
+        counts[("intent", intent or UNKNOWN)] += 1
+        if timestamp is not None:
+            counts[("hour", hour_bucket(timestamp))] += 1
+    return counts
+
+
+def record(db: Session, rows: Iterable[dict]):
+    """Add logged interaction rows to the summary (caller commits)"""
+    counts = aggregate((row.get("language"), row.get("intent"), row.get("timestamp"))
+                       for row in rows)
+    apply_counts(db, counts)
+
+
+def apply_counts(db: Session, counts: Dict[Tuple[str, str], int]):
+    if not counts:
+        return
+    table = InteractionStat.__table__
+    params = [{"dimension": dimension, "bucket": bucket, "count": count}
+              for (dimension, bucket), count in counts.items()]
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        insert = None
+
+    if insert is not None:
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.dimension, table.c.bucket],
+            set_={"count": table.c["count"] + stmt.excluded["count"]})
+        db.execute(stmt, params)
+        return
+
+    for param in params:
+        result = db.execute(
+            table.update()
+            .where(table.c.dimension == param["dimension"])
+            .where(table.c.bucket == param["bucket"])
+            .values(count=table.c["count"] + param["count"]))
+        if result.rowcount == 0:
+            db.execute(table.insert(), param)
+
+
+def get_stats(db: Session) -> dict:
+    """Totals and distributions read from the summary table"""
+    rows = db.query(InteractionStat.dimension, InteractionStat.bucket, InteractionStat.count).filter(
+        InteractionStat.dimension != "hour").all()
+    hourly = db.query(InteractionStat.bucket, InteractionStat.count).filter(
+        InteractionStat.dimension == "hour").order_by(
+        InteractionStat.bucket.desc()).limit(HOURLY_BUCKETS).all()
+
+    stats = {"total": {}, "language": {}, "intent": {}}
+    for dimension, bucket, count in rows:
+        stats.setdefault(dimension, {})[bucket] = count
+
+    return {
+        "total_interactions": stats["total"].get("all", 0),
+        "language_distribution": stats["language"],
+        "intent_distribution": stats["intent"],
+        "hourly_interactions": dict(reversed(hourly)),
+    }
+
+
+def rebuild(db: Session, archived_rows: Iterable[Tuple[str, str, object]] = (),
+            batch_size: int = 10000) -> int:
+    """Recompute the summary table from user_interactions.
+
+    Pass the (language, intent, timestamp) tuples of archived interactions
+    (see retention.iter_archive_stats_rows) to keep counting them.
+    """
+    rows = db.query(UserInteraction.language, UserInteraction.intent,
+                    UserInteraction.timestamp).yield_per(batch_size)
+    counts = aggregate(itertools.chain(archived_rows, rows))
+    db.query(InteractionStat).delete()
+    apply_counts(db, counts)
+    db.commit()
+    return counts[("total", "all")]
+
+
+def ensure_built(session_factory=SessionLocal):
+    """Build the summary once for databases logged before it existed"""
+    db = session_factory()
+    try:
+        if db.query(InteractionStat.id).first() is None and \
+                db.query(UserInteraction.id).first() is not None:
+            rebuild(db)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        print("Usage: python analytics.py rebuild")
+        sys.exit(1)
+    from retention import iter_archive_stats_rows
+
+    init_db()
+    db = SessionLocal()
+    total = rebuild(db, iter_archive_stats_rows())
+    db.close()
+    print(f"Rebuilt interaction stats from {total} interactions")
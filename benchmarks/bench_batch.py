@@ -0,0 +1,56 @@
+"""
+Compare N sequential POST /chat calls with one POST /chat/batch.
+
+    python -m benchmarks.bench_batch --latency 0.1 --messages 100 --senders 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.load_test import free_port, start_app  # noqa: E402
+from benchmarks.stub_rasa import StubRasaServer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch endpoint benchmark")
+    parser.add_argument("--latency", type=float, default=0.1,
+                        help="stub Rasa latency in seconds")
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--senders", type=int, default=20)
+    args = parser.parse_args()
+
+    stub = StubRasaServer(latency=args.latency).start()
+    os.environ["RASA_API_URL"] = stub.url
+
+    import httpx
+
+    port = free_port()
+    server, thread = start_app(port)
+    messages = [{"message": f"question {i}", "sender_id": f"gateway_{i % args.senders}",
+                 "language": "en"} for i in range(args.messages)]
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=600) as client:
+            start = time.perf_counter()
+            for message in messages:
+                client.post("/chat", json=message).raise_for_status()
+            sequential = time.perf_counter() - start
+
+            start = time.perf_counter()
+            client.post("/chat/batch", json={"messages": messages}).raise_for_status()
+            batch = time.perf_counter() - start
+    finally:
+        server.should_exit = True
+        thread.join()
+        stub.stop()
+
+    print(f"{args.messages} messages from {args.senders} senders, "
+          f"stub Rasa latency {args.latency * 1000:.0f} ms")
+    print(f"sequential /chat: {sequential:8.2f} s")
+    print(f"/chat/batch:      {batch:8.2f} s  ({sequential / batch:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
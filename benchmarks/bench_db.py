@@ -0,0 +1,102 @@
+"""
+Concurrency benchmark for the interaction database.
+
+Simulates the two hot paths against a scratch SQLite file: log flushes from
+/chat (bulk insert plus summary upsert, as the interaction log writer does)
+and /stats reads. Runs each combination of journal mode and worker count and
+reports writes and reads per second.
+
+    python -m benchmarks.bench_db --workers 2 4 8 --seconds 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import analytics  # noqa: E402
+from database import UserInteraction, create_db_engine, init_db  # noqa: E402
+
+
+def run(journal_mode, synchronous, workers, seconds, batch_size):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_db_engine(f"sqlite:///{path}", journal_mode, synchronous)
+    init_db(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    counts = {"writes": 0, "reads": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def writer(worker_id):
+        while time.perf_counter() < deadline:
+            rows = [{"sender_id": f"user_{worker_id}_{i}", "message": "I have a fever",
+                     "response": "For fever, take adequate rest and stay hydrated.",
+                     "intent": "fallback", "language": "en",
+                     "timestamp": datetime.utcnow()} for i in range(batch_size)]
+            db = session_factory()
+            try:
+                db.execute(UserInteraction.__table__.insert(), rows)
+                analytics.record(db, rows)
+                db.commit()
+                key = "writes"
+            except Exception:
+                db.rollback()
+                key = "errors"
+            finally:
+                db.close()
+            with lock:
+                counts[key] += 1
+
+    def reader():
+        while time.perf_counter() < deadline:
+            db = session_factory()
+            try:
+                analytics.get_stats(db)
+                key = "reads"
+            except Exception:
+                key = "errors"
+            finally:
+                db.close()
+            with lock:
+                counts[key] += 1
+
+    # One writer per process mirrors the single log writer task; the rest
+    # of the workers serve /stats
+    threads = [threading.Thread(target=writer, args=(0,))]
+    threads += [threading.Thread(target=reader) for _ in range(max(workers - 1, 1))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    return {key: value / seconds for key, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database concurrency benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--batch-size", type=int, default=50,
+                        help="interactions per log flush")
+    args = parser.parse_args()
+
+    print(f"{'journal':>8} {'sync':>7} {'workers':>8} {'flushes/s':>10} "
+          f"{'rows/s':>9} {'stats/s':>9} {'errors/s':>9}")
+    for journal_mode, synchronous in [("DELETE", "FULL"), ("WAL", "NORMAL")]:
+        for workers in args.workers:
+            result = run(journal_mode, synchronous, workers, args.seconds, args.batch_size)
+            print(f"{journal_mode:>8} {synchronous:>7} {workers:>8} {result['writes']:>10.1f} "
+                  f"{result['writes'] * args.batch_size:>9.0f} {result['reads']:>9.1f} "
+                  f"{result['errors']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark the compiled fallback matcher against the original keyword chain.
+
+The original get_fallback_response ran one `any(word in message_lower ...)`
+scan per topic, so its cost grew with the number of topics. This script
+builds synthetic topic tables of increasing size and times both approaches
+on the same messages.
+
+    python -m benchmarks.bench_fallback
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fallback import FallbackEngine, fallback_engine  # noqa: E402
+
+
+def synthetic_topics(count, seed=0):
+    """Real topics first, then generated ones with romanized-style keywords"""
+    rng = random.Random(seed)
+    topics = list(fallback_engine.topics)
+    letters = "abcdefghijklmnoprstuvwy"
+    while len(topics) < count:
+        keywords = ["".join(rng.choice(letters) for _ in range(rng.randint(5, 10)))
+                    for _ in range(5)]
+        topics.append({
+            "topic": f"topic_{len(topics)}",
+            "keywords": {"romanized": keywords},
+            "responses": {"en": f"reply {len(topics)}"},
+        })
+    return topics[:count]
+
+
+def legacy_match(topics, message):
+    """The if/elif chain from the original get_fallback_response, with Latin
+    keywords matched as whole words like the compiled matcher does"""
+    message_lower = message.lower()
+    words_only = " " + re.sub(r"[\W\d_]+", " ", message_lower) + " "
+    for topic in topics:
+        words = [w for ws in topic["keywords"].values() for w in ws]
+        if any(f" {word} " in words_only if word.isascii() else word in message_lower
+               for word in words):
+            return topic["topic"]
+    return None
+
+
+def messages_for(topics):
+    last = topics[-1]["keywords"]
+    last_keyword = next(k for ks in last.values() for k in ks)
+    return [
+        "Hello, I have a fever",
+        "I have had a bad cough for three days and my chest hurts at night",
+        f"please tell me about {last_keyword} in my village",
+        "ନମସ୍କାର, ମୋର ମାଥା ବଥା ହେଉଛି",
+        "मुझे कुछ समझ नहीं आ रहा कि क्या करूं",
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fallback matcher benchmark")
+    parser.add_argument("--topics", type=int, nargs="+", default=[5, 50, 500])
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'topics':>7} {'chain us/msg':>14} {'compiled us/msg':>16} {'speedup':>8}")
+    for count in args.topics:
+        topics = synthetic_topics(count)
+        precomputed = [{"topic": t["topic"],
+                        "keywords": {"all": [w for ws in t["keywords"].values() for w in ws]}}
+                       for t in topics]
+        engine = FallbackEngine(topics, {"en": "default"})
+        messages = messages_for(topics)
+
+        for message in messages:
+            assert legacy_match(precomputed, message) == engine.match(message), message
+
+        chain = timeit.timeit(
+            lambda: [legacy_match(precomputed, m) for m in messages], number=args.number)
+        compiled = timeit.timeit(
+            lambda: [engine.match(m) for m in messages], number=args.number)
+        per_message = args.number * len(messages) / 1e6
+        print(f"{count:>7} {chain / per_message:>14.2f} {compiled / per_message:>16.2f} "
+              f"{chain / compiled:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark language detection on the training examples in data/nlu.yml.
+
+Every example is run through the same steps /chat applies once per request
+(NFC normalization, then detection without a requested language). The
+script prints the time per message and what each example was detected as,
+split by whether it is written in a non-Latin script.
+
+    python -m benchmarks.bench_language
+"""
+import argparse
+import os
+import sys
+import timeit
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from language import detect_language, normalize_message  # noqa: E402
+
+
+def nlu_examples(path):
+    """(intent, example) pairs from a Rasa NLU file, without needing PyYAML"""
+    examples = []
+    intent = None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped.startswith("- intent:"):
+                intent = stripped.split(":", 1)[1].strip()
+            elif intent and stripped.startswith("- "):
+                examples.append((intent, stripped[2:]))
+    return examples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Language detection benchmark")
+    parser.add_argument("--nlu", default=os.path.join(ROOT, "data", "nlu.yml"))
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    messages = [example for _, example in nlu_examples(args.nlu)]
+
+    def detect_all():
+        return [detect_language(normalize_message(m)) for m in messages]
+
+    elapsed = timeit.timeit(detect_all, number=args.number)
+    print(f"{len(messages)} messages, "
+          f"{elapsed / (args.number * len(messages)) * 1e6:.2f} us/message")
+
+    results = Counter()
+    for message, language in zip(messages, detect_all()):
+        kind = "latin" if message.isascii() else "native script"
+        results[kind, language] += 1
+    for (kind, language), count in sorted(results.items()):
+        print(f"  {kind:>13} -> {language}: {count}")
+
+
+if __name__ == "__main__":
+    main()
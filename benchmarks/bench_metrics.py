@@ -0,0 +1,78 @@
+"""
+Measure the overhead of the metrics instrumentation.
+
+Times a `stage()` block against an uninstrumented one, and a minimal ASGI
+app called directly with and without TimingMiddleware, so the numbers show
+only what the instrumentation adds to each request. A /chat request runs
+four or five stages plus the middleware.
+
+    python -m benchmarks.bench_metrics
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import TimingMiddleware, registry, stage  # noqa: E402
+
+
+async def plain_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def timed_app(scope, receive, send):
+    with stage("bench"):
+        pass
+    await plain_app(scope, receive, send)
+
+
+async def drive(app, requests):
+    scope = {"type": "http", "method": "POST", "path": "/bench", "root_path": "",
+             "headers": [], "endpoint": plain_app}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrics overhead benchmark")
+    parser.add_argument("--number", type=int, default=200000)
+    args = parser.parse_args()
+
+    def bare():
+        pass
+
+    def timed():
+        with stage("bench"):
+            pass
+
+    per_call = 1e6 / args.number
+    bare_us = timeit.timeit(bare, number=args.number) * per_call
+    stage_us = timeit.timeit(timed, number=args.number) * per_call
+    print(f"stage() block:          {stage_us - bare_us:6.2f} us")
+
+    plain = asyncio.run(drive(plain_app, args.number)) * per_call
+    instrumented = asyncio.run(drive(TimingMiddleware(timed_app), args.number)) * per_call
+    print(f"middleware + one stage: {instrumented - plain:6.2f} us per request")
+
+    start = time.perf_counter()
+    registry.render()
+    print(f"render /metrics:        {(time.perf_counter() - start) * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
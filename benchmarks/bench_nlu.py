@@ -0,0 +1,120 @@
+"""
+Evaluate the in-process NLU fast path against tests/test_stories.yml.
+
+Every user turn of the test stories is classified and checked against the
+annotated intent. For turns the fast path would answer without Rasa, the
+reply is also checked against the bot actions that follow the turn in the
+story. The script prints accuracy, how many turns skip Rasa, and the time
+per message.
+
+With --cross-validate every training example is also classified by a
+classifier built without it (leave-one-out), which says more about unseen
+phrasings than the handful of test stories does.
+
+    python -m benchmarks.bench_nlu
+    python -m benchmarks.bench_nlu --cross-validate
+"""
+import argparse
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from nlu import (NLU_DOMAIN_PATH, IntentClassifier, NLUFastPath,  # noqa: E402
+                 _load_yaml, _turns, training_examples)
+
+
+def story_turns(path):
+    """(message, intent, actions) for each user turn in a Rasa test stories file"""
+    turns = []
+    for story in _load_yaml(path).get("stories") or []:
+        steps = story.get("steps") or []
+        messages = [step["user"].strip() for step in steps if "user" in step]
+        for message, (intent, actions) in zip(messages, _turns(steps)):
+            turns.append((message, intent, actions))
+    return turns
+
+
+def replies_match(messages, actions, responses):
+    """Whether the bot messages are what the story's actions would say"""
+    if len(messages) != len(actions):
+        return False
+    return all(message.get("text") in [t.get("text") for t in responses.get(action, [])]
+               for message, action in zip(messages, actions))
+
+
+def evaluate(fast_path, turns, responses):
+    correct = answered = answered_correctly = 0
+    for message, intent, actions in turns:
+        predicted, _, _ = fast_path.classifier.classify(message)
+        correct += predicted == intent
+        answer = fast_path.answer(message)
+        if answer is None:
+            continue
+        answered += 1
+        if answer[0] == intent and replies_match(answer[1], actions, responses):
+            answered_correctly += 1
+        else:
+            print(f"  wrong fast-path answer: {message!r} -> {answer[0]} (expected {intent})")
+    return correct, answered, answered_correctly
+
+
+def cross_validate(examples, fast_path):
+    correct = answered = answered_correctly = 0
+    for i, (intent, text) in enumerate(examples):
+        classifier = IntentClassifier(examples[:i] + examples[i + 1:])
+        held_out = NLUFastPath(classifier, fast_path.replies, enabled=True,
+                               threshold=fast_path.threshold, margin=fast_path.margin)
+        predicted, _, _ = classifier.classify(text)
+        correct += predicted == intent
+        answer = held_out.answer(text)
+        if answer is not None:
+            answered += 1
+            answered_correctly += answer[0] == intent
+    return correct, answered, answered_correctly
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NLU fast path evaluation")
+    parser.add_argument("--stories", default=os.path.join(ROOT, "tests", "test_stories.yml"))
+    parser.add_argument("--threshold", type=float)
+    parser.add_argument("--margin", type=float)
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--cross-validate", action="store_true")
+    args = parser.parse_args()
+
+    fast_path = NLUFastPath.from_files()
+    if not fast_path.enabled:
+        sys.exit("the NLU fast path could not be built (is PyYAML installed?)")
+    if args.threshold is not None:
+        fast_path.threshold = args.threshold
+    if args.margin is not None:
+        fast_path.margin = args.margin
+    turns = story_turns(args.stories)
+
+    responses = _load_yaml(NLU_DOMAIN_PATH).get("responses") or {}
+    correct, answered, answered_correctly = evaluate(fast_path, turns, responses)
+    print(f"threshold {fast_path.threshold}, margin {fast_path.margin}, "
+          f"{len(fast_path.classifier.texts)} training examples")
+    print(f"test stories: {len(turns)} user turns, intent accuracy {correct / len(turns):.1%}")
+    print(f"  answered without Rasa: {answered} ({answered / len(turns):.1%}), "
+          f"correct {answered_correctly}/{answered}")
+
+    messages = [message for message, _, _ in turns]
+    classify = fast_path.classifier.classify
+    elapsed = timeit.timeit(lambda: [classify(m) for m in messages], number=args.number)
+    print(f"  {elapsed / (args.number * len(messages)) * 1e6:.1f} us/message uncached")
+
+    if args.cross_validate:
+        examples = training_examples()
+        correct, answered, answered_correctly = cross_validate(examples, fast_path)
+        print(f"leave-one-out: {len(examples)} examples, "
+              f"intent accuracy {correct / len(examples):.1%}")
+        print(f"  answered without Rasa: {answered} ({answered / len(examples):.1%}), "
+              f"correct {answered_correctly}/{answered}")
+
+
+if __name__ == "__main__":
+    main()
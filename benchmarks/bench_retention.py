@@ -0,0 +1,134 @@
+"""
+Insert and range-query latency of user_interactions before and after
+adding the composite (timestamp, language/intent) indexes and archiving old
+rows.
+
+Generates a year of synthetic interactions in a scratch SQLite file, measures
+the old schema (indexes on id and sender_id only), then adds the indexes,
+archives everything older than --days, and measures again.
+
+    python -m benchmarks.bench_retention --rows 10000000 --days 30
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import retention  # noqa: E402
+from database import UserInteraction, create_db_engine, init_db  # noqa: E402
+
+LANGUAGES = ["en", "hi", "or"]
+INTENTS = ["rasa_processed", "fallback"]
+
+
+def populate(engine, rows, now, chunk=50000):
+    rng = random.Random(0)
+    table = UserInteraction.__table__
+    start = now - timedelta(days=365)
+    step = timedelta(days=365) / rows
+    with engine.begin() as connection:
+        for offset in range(0, rows, chunk):
+            connection.execute(table.insert(), [{
+                "sender_id": f"user_{rng.randrange(100000)}",
+                "message": "I have a fever and headache",
+                "response": "For fever, take adequate rest and stay hydrated.",
+                "intent": rng.choice(INTENTS),
+                "language": rng.choice(LANGUAGES),
+                "timestamp": start + step * i,
+            } for i in range(offset, min(offset + chunk, rows))])
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def measure(engine, path, now, repeat):
+    session_factory = sessionmaker(bind=engine)
+    table = UserInteraction.__table__
+
+    def insert_batch():
+        with engine.begin() as connection:
+            connection.execute(table.insert(), [{
+                "sender_id": "bench", "message": "m", "response": "r",
+                "intent": "fallback", "language": "en", "timestamp": now,
+            } for _ in range(200)])
+
+    def last_week_by_language():
+        db = session_factory()
+        db.query(UserInteraction.language, func.count(UserInteraction.id)).filter(
+            UserInteraction.timestamp >= now - timedelta(days=7)).group_by(
+            UserInteraction.language).all()
+        db.close()
+
+    def last_day_by_intent():
+        db = session_factory()
+        db.query(UserInteraction.intent, func.count(UserInteraction.id)).filter(
+            UserInteraction.timestamp >= now - timedelta(days=1)).group_by(
+            UserInteraction.intent).all()
+        db.close()
+
+    return {
+        "insert_200_ms": timed(insert_batch, repeat),
+        "week_by_language_ms": timed(last_week_by_language, repeat),
+        "day_by_intent_ms": timed(last_day_by_intent, repeat),
+        "file_mb": os.path.getsize(path) / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retention benchmark")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=30,
+                        help="days kept in the hot table after archival")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, "retention.db")
+    engine = create_db_engine(f"sqlite:///{path}")
+    init_db(engine)
+    composite = [index for index in UserInteraction.__table__.indexes
+                 if index.name.startswith("ix_user_interactions_timestamp")]
+    for index in composite:
+        index.drop(bind=engine)
+
+    now = datetime.utcnow()
+    start = time.perf_counter()
+    populate(engine, args.rows, now)
+    print(f"populated {args.rows} rows in {time.perf_counter() - start:.1f} s")
+
+    before = measure(engine, path, now, args.repeat)
+
+    for index in composite:
+        index.create(bind=engine)
+    db = sessionmaker(bind=engine)()
+    start = time.perf_counter()
+    archived = retention.archive_before(
+        db, now - timedelta(days=args.days), os.path.join(workdir, "archive"))
+    retention.vacuum(db)
+    db.close()
+    print(f"archived {archived} rows in {time.perf_counter() - start:.1f} s")
+
+    after = measure(engine, path, now, args.repeat)
+
+    print(f"{'':>22} {'before':>10} {'after':>10}")
+    for key in before:
+        print(f"{key:>22} {before[key]:>10.2f} {after[key]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
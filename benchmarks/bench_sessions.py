@@ -0,0 +1,81 @@
+"""
+Memory and time per message of the session store with many distinct senders.
+
+Each simulated message looks up a new sender's session and records a turn,
+as /chat does for a first-time sender. Python heap use (tracemalloc) is
+printed as the number of senders grows; with the memory cap it levels off
+instead of growing with the number of senders. Sessions are not written to
+a database here, only queued for writing, so the pending writes are
+flushed to an in-memory SQLite database every --flush-every messages.
+Tracing allocations slows everything down, so the time per message is an
+upper bound.
+
+    python -m benchmarks.bench_sessions
+    python -m benchmarks.bench_sessions --senders 1000000 --max-memory-mb 16
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from database import Base  # noqa: E402
+from sessions import SessionStore  # noqa: E402
+from shared_state import MemoryState  # noqa: E402
+
+
+def make_store(max_memory_mb: float) -> SessionStore:
+    # One connection, so the lookup threads see the same in-memory database
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False},
+                           poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return SessionStore(sessionmaker(bind=engine), state=MemoryState(),
+                        max_bytes=int(max_memory_mb * 1024 * 1024))
+
+
+async def run(store: SessionStore, senders: int, report_every: int, flush_every: int):
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    for i in range(1, senders + 1):
+        session = await store.get(f"sender_{i}")
+        await store.record(session, "mujhe 3 din se bukhar hai",
+                           "For fever: rest, drink plenty of fluids and see a doctor "
+                           "if it lasts more than 3 days.", "hi", {"symptom": "fever"})
+        if i % flush_every == 0:
+            while store.flush():
+                pass
+        if i % report_every == 0:
+            heap = (tracemalloc.get_traced_memory()[0] - baseline) / 1024 / 1024
+            elapsed = time.perf_counter() - started
+            stats = store.stats()
+            print(f"{i:>9} senders  heap {heap:7.1f} MB  "
+                  f"in memory {stats['in_memory']:>8}  "
+                  f"estimated {stats['memory_bytes'] / 1024 / 1024:6.1f} MB  "
+                  f"{elapsed / i * 1e6:6.1f} us/message")
+    tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--senders", type=int, default=200_000)
+    parser.add_argument("--max-memory-mb", type=float, default=16)
+    parser.add_argument("--report-every", type=int, default=None)
+    parser.add_argument("--flush-every", type=int, default=5_000)
+    args = parser.parse_args()
+
+    store = make_store(args.max_memory_mb)
+    report_every = args.report_every or max(args.senders // 10, 1)
+    asyncio.run(run(store, args.senders, report_every, args.flush_every))
+
+
+if __name__ == "__main__":
+    main()
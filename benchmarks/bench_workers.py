@@ -0,0 +1,150 @@
+"""
+Measure how /chat throughput scales with the number of worker processes.
+
+For each worker count the API is started with `uvicorn --workers N` and a
+fresh database and shared state file. It is then driven by several client
+processes, so the load generator is not the bottleneck. By default the
+message is answered by the in-process NLU fast path and rate limiting is
+on (with limits nobody reaches). Each request then costs only CPU in the
+worker plus a shared-state token bucket update and an interaction log
+write, which is the work that should scale with cores.
+
+    python -m benchmarks.bench_workers --workers 1 2 4 --backend sqlite
+
+Run it on an otherwise idle machine with at least as many cores as the
+largest worker count plus the client processes.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.load_test import free_port  # noqa: E402
+from benchmarks.stub_rasa import StubRasaServer  # noqa: E402
+
+
+def start_server(workers, port, env):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT, env=env)
+    import httpx
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("server did not start")
+
+
+def client(args):
+    """One load-generating process: (first start, last end, requests, errors)"""
+    base_url, client_id, concurrency, count, message = args
+
+    async def run():
+        import httpx
+
+        remaining = list(range(count))
+        errors = 0
+
+        async def sender(worker, http):
+            nonlocal errors
+            while remaining:
+                i = remaining.pop()
+                response = await http.post("/chat", json={
+                    "message": message, "sender_id": f"c{client_id}_{worker}_{i}"})
+                errors += response.status_code != 200
+
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as http:
+            start = time.time()
+            await asyncio.gather(*(sender(w, http) for w in range(concurrency)))
+            return start, time.time(), count, errors
+
+    return asyncio.run(run())
+
+
+def measure(base_url, clients, concurrency, requests, message):
+    per_client = requests // clients
+    jobs = [(base_url, c, concurrency, per_client, message) for c in range(clients)]
+    with multiprocessing.Pool(clients) as pool:
+        # Warm up every worker's connections and caches first
+        pool.map(client, [(base_url, c, concurrency, 50, message) for c in range(clients)])
+        results = pool.map(client, jobs)
+    start = min(r[0] for r in results)
+    end = max(r[1] for r in results)
+    total = sum(r[2] for r in results)
+    return total / (end - start), sum(r[3] for r in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-worker throughput benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--backend", choices=["sqlite", "redis", "memory"], default="sqlite",
+                        help="shared state backend for the workers")
+    parser.add_argument("--clients", type=int, default=max(2, multiprocessing.cpu_count() // 2),
+                        help="load-generating processes")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="concurrent requests per client process")
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--message", default="hello there",
+                        help="chat message; the default is answered without Rasa")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="stub Rasa latency, for messages that reach Rasa")
+    args = parser.parse_args()
+
+    stub = StubRasaServer(latency=args.latency).start()
+    print(f"{multiprocessing.cpu_count()} CPUs, backend {args.backend}, "
+          f"{args.clients} clients x {args.concurrency} concurrent, "
+          f"{args.requests} requests of {args.message!r}")
+    print(f"{'workers':>7} {'req/s':>9} {'speedup':>8} {'efficiency':>10} {'errors':>7}")
+    baseline = None
+    try:
+        for workers in args.workers:
+            workdir = tempfile.mkdtemp(prefix="ama-workers-")
+            env = dict(
+                os.environ,
+                RASA_API_URL=stub.url,
+                DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+                SHARED_STATE_BACKEND=args.backend,
+                SHARED_STATE_PATH=os.path.join(workdir, "state.db"),
+                WEB_CONCURRENCY=str(workers),
+                RATE_LIMIT_ENABLED="true",
+                RATE_LIMIT_SENDER_RATE="1000000", RATE_LIMIT_SENDER_BURST="1000000",
+                RATE_LIMIT_IP_RATE="1000000", RATE_LIMIT_IP_BURST="1000000",
+                ADMISSION_MAX_QUEUE="100000",
+            )
+            port = free_port()
+            server = start_server(workers, port, env)
+            try:
+                rps, errors = measure(f"http://127.0.0.1:{port}", args.clients,
+                                      args.concurrency, args.requests, args.message)
+            finally:
+                server.terminate()
+                server.wait(30)
+                shutil.rmtree(workdir, ignore_errors=True)
+            baseline = baseline or rps / workers
+            speedup = rps / baseline
+            print(f"{workers:>7} {rps:>9.1f} {speedup:>7.2f}x {speedup / workers:>10.0%} "
+                  f"{errors:>7}")
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Load test for POST /chat against a local stub Rasa server.
+
+Runs main.app under uvicorn and drives /chat with an increasing number of
+concurrent senders. With a non-blocking Rasa client, throughput should grow
+with concurrency instead of staying at 1 / latency.
+
+    python -m benchmarks.load_test --latency 0.2 --requests 64
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_rasa import StubRasaServer  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(port):
+    """Run main.app under uvicorn in a background thread"""
+    import uvicorn
+    from main import app
+
+    server = uvicorn.Server(uvicorn.Config(
+        app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread
+
+
+async def drive(base_url, concurrency, total):
+    import httpx
+
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+    latencies = []
+
+    async def sender(worker_id, client):
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            response = await client.post("/chat", json={
+                "message": "I have had a fever for two days",
+                "sender_id": f"load_{worker_id}",
+                "language": "en"
+            })
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(sender(w, client) for w in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "seconds": elapsed,
+        "throughput_rps": total / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2,
+                        help="stub Rasa latency in seconds")
+    parser.add_argument("--requests", type=int, default=64,
+                        help="requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+",
+                        default=[1, 4, 16, 32])
+    args = parser.parse_args()
+
+    stub = StubRasaServer(latency=args.latency).start()
+    # Log the load test's interactions to a scratch database, not the app's
+    workdir = tempfile.mkdtemp(prefix="ama-load-")
+    os.environ["RASA_API_URL"] = stub.url
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    # Measure the server, not the per-sender rate limits
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    port = free_port()
+    server, thread = start_app(port)
+    try:
+        print(f"stub Rasa latency: {args.latency * 1000:.0f} ms")
+        print(f"{'senders':>8} {'req/s':>10} {'p50 ms':>10}")
+        for concurrency in args.concurrency:
+            result = asyncio.run(drive(
+                f"http://127.0.0.1:{port}", concurrency, args.requests))
+            print(f"{result['concurrency']:>8} {result['throughput_rps']:>10.1f} "
+                  f"{result['p50_ms']:>10.1f}")
+    finally:
+        server.should_exit = True
+        thread.join()
+        stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Local stub of the Rasa REST webhook for load tests and benchmarks.
+
+Run standalone with:
+    python -m benchmarks.stub_rasa --port 5005 --latency 0.2
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubRasaHandler(BaseHTTPRequestHandler):
+    """Answers /webhooks/rest/webhook after an artificial delay"""
+
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one write to avoid Nagle/delayed-ACK stalls
+    wbufsize = 64 * 1024
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        stream = "stream=true" in self.path
+
+        with server.lock:
+            server.request_count += 1
+            server.received.append((payload.get("sender"), payload.get("message")))
+
+        if server.error_rate and random.random() < server.error_rate:
+            time.sleep(server.latency)
+            self._send(500, {"error": "injected failure"})
+            return
+
+        replies = [{
+            "recipient_id": payload.get("sender"),
+            "text": f"stub reply to: {payload.get('message', '')}" + (f" ({i + 1})" if i else "")
+        } for i in range(server.messages_per_turn)]
+
+        if not stream:
+            time.sleep(server.latency)
+            self._send(200, replies)
+            return
+
+        # Rasa's stream mode: one JSON message per line, spread over the turn
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for reply in replies:
+            time.sleep(server.latency / len(replies))
+            chunk = (json.dumps(reply) + "\n").encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubRasaServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Bursts of new connections overflow the default backlog of 5 and stall
+    # on SYN retransmits
+    request_queue_size = 1024
+
+    def __init__(self, port=0, latency=0.0, error_rate=0.0, messages_per_turn=1):
+        super().__init__(("127.0.0.1", port), StubRasaHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.messages_per_turn = messages_per_turn
+        self.request_count = 0
+        self.received = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve in a background thread and return self"""
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Rasa REST webhook")
+    parser.add_argument("--port", type=int, default=5005)
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds to wait before answering")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--messages", type=int, default=1,
+                        help="bot messages per turn")
+    args = parser.parse_args()
+
+    server = StubRasaServer(args.port, args.latency, args.error_rate, args.messages)
+    print(f"Stub Rasa listening on {server.url}")
+    server.serve_forever()
@@ -0,0 +1,256 @@
+"""
+Reproducible benchmark suite for the chat API.
+
+Runs main.app under uvicorn against the stub Rasa server, with a fresh
+SQLite database, and drives each endpoint at each concurrency level. Chat
+messages are drawn from the examples in data/nlu.yml with a seeded random
+generator, in the requested language mix. Results (p50/p95/p99 latency,
+throughput, errors) are printed and optionally written as JSON, which a
+later run can compare against to catch regressions:
+
+    python -m benchmarks.suite --output baseline.json
+    # ... change something ...
+    python -m benchmarks.suite --compare baseline.json
+
+With --compare the exit status is 1 if any p95 latency grew, or any
+throughput dropped, by more than --threshold (default 20%).
+
+Most of these messages are training examples, which the in-process NLU
+fast path would answer without calling Rasa. The fast path is therefore
+off unless --fast-path is given, so that the stub's latency and error rate
+apply and runs compare like for like. The share of replies that came from
+the fast path is reported either way.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_language import nlu_examples  # noqa: E402
+from benchmarks.load_test import free_port, start_app  # noqa: E402
+from benchmarks.stub_rasa import StubRasaServer  # noqa: E402
+
+ENDPOINTS = ("chat", "stats", "dashboard")
+
+
+def language_pools(path):
+    """NLU examples grouped by the language they are written in"""
+    from language import detect_language
+
+    pools = {}
+    for _, example in nlu_examples(path):
+        pools.setdefault(detect_language(example), []).append(example)
+    return pools
+
+
+def parse_mix(value):
+    """"en=2,hi=1,or=1" -> {"en": 0.5, "hi": 0.25, "or": 0.25}"""
+    weights = {}
+    for part in value.split(","):
+        language, _, weight = part.partition("=")
+        weights[language.strip()] = float(weight or 1)
+    total = sum(weights.values())
+    return {language: weight / total for language, weight in weights.items()}
+
+
+def chat_requests(pools, mix, count, seed):
+    rng = random.Random(seed)
+    languages = [language for language in mix if pools.get(language)]
+    weights = [mix[language] for language in languages]
+    requests = []
+    for i in range(count):
+        language = rng.choices(languages, weights)[0]
+        requests.append({"message": rng.choice(pools[language]),
+                         "sender_id": f"bench_{i}", "language": language})
+    return requests
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    # round() first so float error such as 0.07 * 100 = 7.000000000000001
+    # does not push the rank up by one
+    rank = max(1, math.ceil(round(fraction * len(sorted_values), 9)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def drive(base_url, endpoint, concurrency, requests):
+    import httpx
+
+    queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+    latencies = []
+    errors = 0
+    fallbacks = 0
+    fast_path = 0
+
+    async def worker(client):
+        nonlocal errors, fallbacks, fast_path
+        while True:
+            try:
+                request = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            if endpoint == "chat":
+                response = await client.post("/chat", json=request)
+            else:
+                response = await client.get(f"/{endpoint}")
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            elif endpoint == "chat":
+                intent = response.json()["intent"]
+                fallbacks += intent == "fallback"
+                fast_path += intent == "fast_path"
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": len(requests),
+        "errors": errors,
+        "fallback_rate": fallbacks / len(requests) if endpoint == "chat" else None,
+        "fast_path_rate": fast_path / len(requests) if endpoint == "chat" else None,
+        "throughput_rps": len(requests) / elapsed,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print changes against a previous run; return True if any regressed"""
+    previous = {(r["endpoint"], r["concurrency"]): r for r in baseline["results"]}
+    regressed = False
+    print(f"\ncompared with {baseline['meta'].get('commit') or 'baseline'}:")
+    for result in results:
+        before = previous.get((result["endpoint"], result["concurrency"]))
+        if before is None:
+            continue
+        p95 = result["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        rps = result["throughput_rps"] / before["throughput_rps"] - 1
+        worse = p95 > threshold or rps < -threshold
+        regressed = regressed or worse
+        print(f"  {result['endpoint']:>9} x{result['concurrency']:<4} p95 {p95:+7.1%}  "
+              f"req/s {rps:+7.1%}{'  REGRESSION' if worse else ''}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat API benchmark suite")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="stub Rasa latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="share of stub Rasa calls that fail")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200,
+                        help="requests per endpoint and concurrency level")
+    parser.add_argument("--languages", default="en=2,hi=1,or=1",
+                        help="language mix of chat messages, e.g. en=2,hi=1,or=1")
+    parser.add_argument("--fast-path", action="store_true",
+                        help="let the NLU fast path answer messages without Rasa")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--nlu", default=os.path.join(ROOT, "data", "nlu.yml"))
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative change counted as a regression")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+
+    stub = StubRasaServer(latency=args.latency, error_rate=args.error_rate).start()
+    workdir = tempfile.mkdtemp(prefix="ama-bench-")
+    os.environ["RASA_API_URL"] = stub.url
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ["NLU_FAST_PATH_ENABLED"] = "true" if args.fast_path else "false"
+    random.seed(args.seed)  # the stub's error injection
+
+    pools = language_pools(args.nlu)
+    mix = parse_mix(args.languages)
+    # /dashboard reads its page relative to the working directory
+    os.chdir(ROOT)
+    port = free_port()
+    server, thread = start_app(port)
+    base_url = f"http://127.0.0.1:{port}"
+    results = []
+    try:
+        asyncio.run(drive(base_url, "chat", 4, chat_requests(pools, mix, 20, args.seed)))
+        for endpoint in args.endpoints:
+            for concurrency in args.concurrency:
+                requests = chat_requests(pools, mix, args.requests, args.seed) \
+                    if endpoint == "chat" else [None] * args.requests
+                results.append(asyncio.run(drive(base_url, endpoint, concurrency, requests)))
+    finally:
+        server.should_exit = True
+        thread.join()
+        stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"stub Rasa latency {args.latency * 1000:.0f} ms, error rate {args.error_rate:.0%}, "
+          f"languages {args.languages}, fast path {'on' if args.fast_path else 'off'}")
+    print(f"{'endpoint':>9} {'conc':>5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'errors':>7} {'fast path':>10}")
+    for r in results:
+        fast_path = "" if r["fast_path_rate"] is None else f"{r['fast_path_rate']:.0%}"
+        print(f"{r['endpoint']:>9} {r['concurrency']:>5} {r['throughput_rps']:>9.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['errors']:>7} "
+              f"{fast_path:>10}")
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {key: value for key, value in vars(args).items()
+                           if key not in ("output", "compare")},
+        },
+        "results": results,
+    }
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {output}")
+
+    if baseline_path:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
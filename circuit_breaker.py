@@ -0,0 +1,104 @@
+import os
+import time
+from collections import deque
+
+# Circuit breaker configuration for the Rasa connection
+RASA_BREAKER_FAILURE_RATE = float(os.getenv("RASA_BREAKER_FAILURE_RATE", "0.5"))
+RASA_BREAKER_MIN_CALLS = int(os.getenv("RASA_BREAKER_MIN_CALLS", "5"))
+RASA_BREAKER_WINDOW = int(os.getenv("RASA_BREAKER_WINDOW", "20"))
+RASA_BREAKER_COOLDOWN = float(os.getenv("RASA_BREAKER_COOLDOWN", "30"))
+RASA_BREAKER_HALF_OPEN_CALLS = int(os.getenv("RASA_BREAKER_HALF_OPEN_CALLS", "1"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker.
+
+    The outcome of the last `window` calls is kept. Once at least `min_calls`
+    have been recorded and the share of failures reaches `failure_rate`, the
+    circuit opens and calls are rejected immediately. After `cooldown` seconds
+    it goes half-open and lets `half_open_calls` probes through: a successful
+    probe closes the circuit, a failed one opens it for another cooldown.
+    """
+
+    def __init__(self, failure_rate: float = RASA_BREAKER_FAILURE_RATE,
+                 min_calls: int = RASA_BREAKER_MIN_CALLS,
+                 window: int = RASA_BREAKER_WINDOW,
+                 cooldown: float = RASA_BREAKER_COOLDOWN,
+                 half_open_calls: int = RASA_BREAKER_HALF_OPEN_CALLS,
+                 clock=time.monotonic):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.half_open_calls = half_open_calls
+        self.clock = clock
+        self._outcomes = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = None
+        self._probes = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self.clock() - self._opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a call may go through now; counts rejected calls"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._probes < self.half_open_calls:
+            self._probes += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def release(self):
+        """Give back a half-open probe whose call ended without an outcome"""
+        if self._state == HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def record_success(self):
+        if self._state == HALF_OPEN:
+            self._state = CLOSED
+            self._outcomes.clear()
+        self._outcomes.append(True)
+
+    def record_failure(self):
+        if self._state == HALF_OPEN:
+            self._open()
+            return
+        self._outcomes.append(False)
+        if self._state == CLOSED and len(self._outcomes) >= self.min_calls and \
+                self._failures() / len(self._outcomes) >= self.failure_rate:
+            self._open()
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = self.clock()
+        self.times_opened += 1
+
+    def _failures(self) -> int:
+        return sum(1 for ok in self._outcomes if not ok)
+
+    def stats(self) -> dict:
+        """Current state and recent failure rate"""
+        calls = len(self._outcomes)
+        return {
+            "state": self.state,
+            "recent_calls": calls,
+            "recent_failure_rate": self._failures() / calls if calls else 0.0,
+            "rejected": self.rejected,
+            "times_opened": self.times_opened,
+        }
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, HealthContent
+
+# Content cache configuration
+CONTENT_CACHE_SIZE = int(os.getenv("CONTENT_CACHE_SIZE", "1024"))
+CONTENT_CACHE_TTL = float(os.getenv("CONTENT_CACHE_TTL", "300"))
+
+_MISSING = object()
+
+
+class HealthContentCache:
+    """Read-through LRU cache of HealthContent rows keyed by (topic, language).
+
+    Entries expire after `ttl` seconds and the least recently used entry is
+    evicted once `max_size` is reached. Lookups that find no row are cached
+    too, so unknown topics do not reach the database on every request.
+    ORM writes to health_content invalidate the affected keys when their
+    session commits; writes made by another process are only picked up once
+    the TTL expires.
+    """
+
+    def __init__(self, max_size: int = CONTENT_CACHE_SIZE, ttl: float = CONTENT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, topic: str, language: str, db: Session):
+        """Return the content for (topic, language), querying db on a miss"""
+        key = (topic, language)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return None if entry[1] is _MISSING else entry[1]
+            self.misses += 1
+
+        content = db.query(HealthContent).filter(
+            HealthContent.topic == topic,
+            HealthContent.language == language
+        ).first()
+        if content is not None:
+            db.expunge(content)
+        self._store(key, _MISSING if content is None else content, now)
+        return content
+
+    def preload(self, session_factory=SessionLocal):
+        """Load every health_content row into the cache"""
+        db = session_factory()
+        try:
+            rows = db.query(HealthContent).order_by(HealthContent.id).all()
+            db.expunge_all()
+        finally:
+            db.close()
+
+        now = time.monotonic()
+        for row in reversed(rows):
+            # Keep the first row per key, matching the .first() lookup in get()
+            self._store((row.topic, row.language), row, now)
+        return len(rows)
+
+    def invalidate(self, topic: str = None, language: str = None):
+        """Drop cached entries; with no arguments the whole cache is cleared"""
+        with self._lock:
+            if topic is None and language is None:
+                self._entries.clear()
+                return
+            for key in list(self._entries):
+                if (topic is None or key[0] == topic) and (language is None or key[1] == language):
+                    del self._entries[key]
+
+    def _store(self, key, value, now):
+        with self._lock:
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+health_content_cache = HealthContentCache()
+
+
+def _mark_changed(target, key):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_content", set()).add(key)
+
+
+@event.listens_for(HealthContent, "after_insert")
+def _track_content_insert(mapper, connection, target):
+    _mark_changed(target, (target.topic, target.language))
+
+
+@event.listens_for(HealthContent, "after_update")
+@event.listens_for(HealthContent, "after_delete")
+def _track_content_change(mapper, connection, target):
+    # The row may have moved between keys, so drop everything
+    _mark_changed(target, (None, None))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_content(session):
+    for topic, language in session.info.pop("changed_content", ()):
+        health_content_cache.invalidate(topic, language)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_content(session):
+    session.info.pop("changed_content", None)
@@ -1,13 +1,68 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime
+from sqlalchemy import create_engine, event, Column, Integer, String, Text, DateTime, Index, UniqueConstraint
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 from datetime import datetime
+import os
 
 # Database setup
-SQLALCHEMY_DATABASE_URL = "sqlite:///./health_chatbot.db"
-
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./health_chatbot.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# SQLite tuning: WAL lets readers run while the log writer commits
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "20000"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL,
+                     journal_mode: str = SQLITE_JOURNAL_MODE,
+                     synchronous: str = SQLITE_SYNCHRONOUS):
+    """Create an engine for url with pooling and, for SQLite, tuned pragmas"""
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_engine(
+            url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+
+    database = make_url(url).database
+    if not database or database == ":memory:":
+        # An in-memory database lives in one connection; share that one
+        # connection with every thread (log writer, session loader, ...)
+        return create_engine(url, connect_args={"check_same_thread": False},
+                             poolclass=StaticPool)
+
+    sqlite_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False,
+                      "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        poolclass=QueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
+    @event.listens_for(sqlite_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={synchronous}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.close()
+
+    return sqlite_engine
+
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -26,6 +81,13 @@ class HealthContent(Base):
 
 class UserInteraction(Base):
     __tablename__ = "user_interactions"
+    __table_args__ = (
+        # Time-range analytics and archival scan by timestamp first
+        Index("ix_user_interactions_timestamp_language", "timestamp", "language"),
+        Index("ix_user_interactions_timestamp_intent", "timestamp", "intent"),
+        # Archival empties the table; never hand out an archived row's id again
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     sender_id = Column(String, index=True)
@@ -36,8 +98,37 @@ class UserInteraction(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
 
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+class ConversationSession(Base):
+    """Recent turns and slots per sender, written in batches by the session store"""
+    __tablename__ = "conversation_sessions"
+
+    sender_id = Column(String, primary_key=True)
+    language = Column(String)
+    slots = Column(Text)  # JSON object, e.g. {"symptom": "fever", "age": 4}
+    turns = Column(Text)  # JSON list of [message, reply], oldest first
+    updated_at = Column(DateTime, index=True)
+
+
+class InteractionStat(Base):
+    """Running interaction counts, maintained as interactions are logged"""
+    __tablename__ = "interaction_stats"
+    __table_args__ = (UniqueConstraint("dimension", "bucket"),)
+
+    id = Column(Integer, primary_key=True)
+    dimension = Column(String, nullable=False)  # "total", "language", "intent", "hour"
+    bucket = Column(String, nullable=False)  # e.g. "en", "fallback", "2025-09-20T14:00"
+    count = Column(Integer, nullable=False, default=0)
+
+
+def init_db(bind=engine):
+    """Create any missing tables and indexes; run once at startup or deploy time"""
+    Base.metadata.create_all(bind=bind)
+    # create_all skips tables that already exist, so add indexes introduced
+    # after a table was first created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
 
 # Dependency to get DB session
 
@@ -92,5 +183,6 @@ def populate_sample_data():
 
 
 if __name__ == "__main__":
+    init_db()
     populate_sample_data()
     print("Sample data populated!")
@@ -0,0 +1,159 @@
+import json
+import os
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+FALLBACK_TOPICS_PATH = os.getenv(
+    "FALLBACK_TOPICS_PATH",
+    os.path.join(os.path.dirname(__file__), "content", "fallback_topics.json"))
+
+
+def normalize_text(text: str) -> str:
+    """NFC-normalize and case-fold text so equivalent spellings compare equal"""
+    return unicodedata.normalize("NFC", text).casefold()
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over a set of keywords.
+
+    Each keyword carries a priority (lower wins). `best_match` scans the text
+    once and returns the value of the lowest-priority keyword found anywhere
+    in it, so the cost is linear in the message length no matter how many
+    keywords or topics are loaded.
+
+    With whole_words, Latin-script keywords only match when not preceded or
+    followed by a letter, so "hi" is not found in "which" or "this". Other
+    scripts still match anywhere, since their words carry vowel signs and
+    conjuncts a letter test would misjudge.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, int]], whole_words: bool = False):
+        self.whole_words = whole_words
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._best: List[Optional[int]] = [None]
+        # (priority, length, needs word boundaries) of keywords ending at a node
+        self._out: List[List[Tuple[int, int, bool]]] = [[]]
+
+        for keyword, priority in keywords:
+            if not keyword:
+                continue
+            node = 0
+            for char in keyword:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                    self._out.append([])
+                node = next_node
+            if self._best[node] is None or priority < self._best[node]:
+                self._best[node] = priority
+            self._out[node].append((priority, len(keyword), whole_words and keyword.isascii()))
+
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                # A node also matches every keyword that is a suffix of it
+                inherited = self._best[self._fail[child]]
+                if inherited is not None and (self._best[child] is None or inherited < self._best[child]):
+                    self._best[child] = inherited
+                self._out[child] = sorted(self._out[child] + self._out[self._fail[child]])
+
+    def best_match(self, text: str) -> Optional[int]:
+        """Lowest priority among keywords occurring in text, or None"""
+        if self.whole_words:
+            return self._best_whole_word(text)
+        goto, fail, best = self._goto, self._fail, self._best
+        node = 0
+        found = None
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            priority = best[node]
+            if priority is not None and (found is None or priority < found):
+                found = priority
+                if found == 0:
+                    break
+        return found
+
+    def _best_whole_word(self, text: str) -> Optional[int]:
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        found = None
+        last = len(text) - 1
+        for end, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for priority, length, bounded in out[node]:
+                if found is not None and priority >= found:
+                    break
+                if bounded:
+                    start = end - length + 1
+                    if (start > 0 and text[start - 1].isalpha()) or (
+                            end < last and text[end + 1].isalpha()):
+                        continue
+                found = priority
+                break
+            if found == 0:
+                break
+        return found
+
+
+class FallbackEngine:
+    """Data-driven replies used when Rasa is unavailable"""
+
+    def __init__(self, topics: List[dict], default: Dict[str, str]):
+        self.topics = topics
+        self.default = default
+        self.by_name = {topic["topic"]: topic for topic in topics}
+        # Topics a follow-up question can refer back to (not greetings)
+        self.context_topics = frozenset(
+            topic["topic"] for topic in topics if topic.get("remember", True))
+        self.matcher = KeywordMatcher(
+            ((normalize_text(keyword), priority)
+             for priority, topic in enumerate(topics)
+             for keywords in topic["keywords"].values()
+             for keyword in keywords),
+            whole_words=True)
+
+    @classmethod
+    def from_file(cls, path: str = FALLBACK_TOPICS_PATH) -> "FallbackEngine":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["topics"], data["default"])
+
+    def match(self, message: str) -> Optional[str]:
+        """Name of the topic the message is about, or None"""
+        priority = self.matcher.best_match(normalize_text(message))
+        if priority is None:
+            return None
+        return self.topics[priority]["topic"]
+
+    def respond(self, message: str, language: str,
+                context: Optional[str] = None) -> Tuple[Optional[str], str]:
+        """Return (topic, reply) for a message in the requested language.
+
+        A message that names no topic is taken as a follow-up about context,
+        the topic of the conversation so far, if there is one.
+        """
+        topic = self.match(message)
+        if topic is None and context in self.context_topics:
+            topic = context
+        responses = self.default if topic is None else self.by_name[topic]["responses"]
+        return topic, responses.get(language, responses["en"])
+
+
+fallback_engine = FallbackEngine.from_file()
@@ -1,5 +1,7 @@
 // Configuration
 const API_BASE_URL = 'http://localhost:8001';
+// One sender per page load, so the bot can follow the conversation
+const SENDER_ID = `demo_user_${Date.now()}_${Math.random().toString(36).slice(2, 8)}`;
 let chatHistory = [];
 let isConnected = false;
 
@@ -109,38 +111,46 @@ async function sendMessage() {
     const typingId = addTypingIndicator();
 
     try {
-        let response;
-        
         if (isConnected) {
-            // Try to send to real API
-            const apiResponse = await fetch(`${API_BASE_URL}/chat`, {
+            // Stream the reply from the API so each message shows up as
+            // soon as the server has it
+            const apiResponse = await fetch(`${API_BASE_URL}/chat/stream`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                 },
                 body: JSON.stringify({
                     message: message,
-                    sender_id: `demo_user_${Date.now()}`,
+                    sender_id: SENDER_ID,
                     language: languageSelect.value
                 }),
             });
 
-            if (apiResponse.ok) {
-                const data = await apiResponse.json();
-                response = data.response;
-            } else {
+            if (!apiResponse.ok) {
                 throw new Error('API request failed');
             }
+
+            let typingShown = true;
+            await readMessageStream(apiResponse, function(botMessage) {
+                if (typingShown) {
+                    removeTypingIndicator(typingId);
+                    typingShown = false;
+                }
+                addBotMessage(botMessage.text || '', botMessage);
+            });
+            if (typingShown) {
+                removeTypingIndicator(typingId);
+            }
         } else {
             // Use demo responses
-            response = getDemoResponse(message, languageSelect.value);
-        }
+            const response = getDemoResponse(message, languageSelect.value);
 
-        // Remove typing indicator and add response
-        setTimeout(() => {
-            removeTypingIndicator(typingId);
-            addBotMessage(response);
-        }, 1500); // Simulate typing delay
+            // Remove typing indicator and add response
+            setTimeout(() => {
+                removeTypingIndicator(typingId);
+                addBotMessage(response);
+            }, 1500); // Simulate typing delay
+        }
 
     } catch (error) {
         console.error('Error sending message:', error);
@@ -151,6 +161,39 @@ async function sendMessage() {
     }
 }
 
+// Read newline-delimited JSON from /chat/stream, calling onMessage for
+// each bot message as it arrives
+async function readMessageStream(apiResponse, onMessage) {
+    if (!apiResponse.body || !window.TextDecoder) {
+        // No streaming support: parse the whole body at once
+        const text = await apiResponse.text();
+        text.split('\n').filter(Boolean).map(JSON.parse)
+            .filter(event => event.type === 'message').forEach(onMessage);
+        return;
+    }
+
+    const reader = apiResponse.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let newline;
+        while ((newline = buffer.indexOf('\n')) >= 0) {
+            const line = buffer.slice(0, newline).trim();
+            buffer = buffer.slice(newline + 1);
+            if (!line) continue;
+            const event = JSON.parse(line);
+            if (event.type === 'message') {
+                onMessage(event);
+            }
+        }
+    }
+}
+
 // Send quick message
 function sendQuickMessage(message) {
     messageInput.value = message;
@@ -174,8 +217,8 @@ function addUserMessage(message) {
     scrollToBottom();
 }
 
-// Add bot message to chat
-function addBotMessage(message) {
+// Add bot message to chat; extras may carry an image and quick-reply buttons
+function addBotMessage(message, extras = {}) {
     const messageElement = document.createElement('div');
     messageElement.className = 'message bot-message';
     messageElement.innerHTML = `
@@ -187,6 +230,24 @@ function addBotMessage(message) {
             <div class="message-time">${getCurrentTime()}</div>
         </div>
     `;
+
+    const content = messageElement.querySelector('.message-content');
+    const time = content.querySelector('.message-time');
+    if (extras.image) {
+        const imageElement = document.createElement('img');
+        imageElement.src = extras.image;
+        imageElement.alt = '';
+        imageElement.style.maxWidth = '100%';
+        content.insertBefore(imageElement, time);
+    }
+    (extras.buttons || []).forEach(button => {
+        const buttonElement = document.createElement('span');
+        buttonElement.className = 'quick-question';
+        buttonElement.textContent = button.title;
+        buttonElement.addEventListener('click', () => sendQuickMessage(button.payload || button.title));
+        content.insertBefore(buttonElement, time);
+    });
+
     chatMessages.appendChild(messageElement);
     scrollToBottom();
 }
@@ -0,0 +1,25 @@
+"""
+Gunicorn settings for serving the API with several worker processes.
+
+    pip install gunicorn
+    gunicorn main:app -c gunicorn.conf.py
+
+One worker per CPU by default (WEB_CONCURRENCY overrides). With more than
+one worker, rate limits and live dashboard figures are kept in a
+SQLite file all workers share, unless SHARED_STATE_BACKEND says otherwise
+(e.g. redis when the workers run on several machines).
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Streams such as /stats/stream stay open; give them time to end on restart
+graceful_timeout = 30
+keepalive = 5
+
+# Read by the workers, which are forked after this file runs
+os.environ.setdefault("WEB_CONCURRENCY", str(workers))
+if workers > 1:
+    os.environ.setdefault("SHARED_STATE_BACKEND", "sqlite")
@@ -0,0 +1,179 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import List
+
+import analytics
+from database import SessionLocal, UserInteraction
+from metrics import stage
+
+# Background writer configuration
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "200"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))
+LOG_ENQUEUE_TIMEOUT = float(os.getenv("LOG_ENQUEUE_TIMEOUT", "0.05"))
+
+_STOP = object()
+
+
+class InteractionLogger:
+    """Queues user interactions in memory and writes them in bulk inserts.
+
+    A single writer task flushes the queue when `batch_size` entries are
+    waiting or `flush_interval` seconds after the first queued entry,
+    whichever comes first. An entry is one interaction, or several queued
+    together by `log_many`, which always land in the same transaction. When
+    the queue is full, producers wait up to `enqueue_timeout` seconds for
+    space and the entry is dropped after that.
+
+    Objects in `listeners` are told about rows as they are accepted
+    (`logged(rows)`, on the event loop) and once the writer is done with
+    them (`written(rows)`, on the writer's thread).
+    """
+
+    def __init__(self, session_factory=SessionLocal,
+                 max_queue: int = LOG_QUEUE_SIZE,
+                 batch_size: int = LOG_BATCH_SIZE,
+                 flush_interval: float = LOG_FLUSH_INTERVAL,
+                 enqueue_timeout: float = LOG_ENQUEUE_TIMEOUT):
+        self.session_factory = session_factory
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue = None
+        self._batch_ready = None
+        self._task = None
+        self._stopping = False
+        self.listeners = []
+        self.enqueued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Start the writer task on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._batch_ready = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything still queued and stop the writer task"""
+        if not self.running:
+            return
+        self._stopping = True
+        self._batch_ready.set()
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def log(self, sender_id: str, message: str, response: str, intent: str, language: str) -> bool:
+        """Queue an interaction; returns False if it had to be dropped"""
+        return await self.log_many([{
+            "sender_id": sender_id,
+            "message": message,
+            "response": response,
+            "intent": intent,
+            "language": language,
+        }])
+
+    async def log_many(self, rows: List[dict]) -> bool:
+        """Queue several interactions to be written in the same transaction"""
+        if not rows:
+            return True
+        timestamp = datetime.utcnow()
+        rows = [{**row, "timestamp": timestamp} for row in rows]
+
+        if not self.running:
+            # No writer (e.g. scripts importing main without the app
+            # lifespan): write straight through.
+            self._notify("logged", rows)
+            await asyncio.to_thread(self._write, rows)
+            return True
+
+        try:
+            self._queue.put_nowait(rows)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(rows), self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.dropped += len(rows)
+                return False
+
+        self.enqueued += len(rows)
+        self._notify("logged", rows)
+        if self._queue.qsize() >= self.batch_size:
+            self._batch_ready.set()
+        return True
+
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            if first is _STOP:
+                return
+
+            if not self._stopping and self._queue.qsize() < self.batch_size - 1:
+                self._batch_ready.clear()
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = list(first)
+            stopping = False
+            while len(batch) < self.batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.extend(item)
+
+            await asyncio.to_thread(self._write, batch)
+            if stopping:
+                return
+
+    def _write(self, rows):
+        db = self.session_factory()
+        try:
+            with stage("db_write"):
+                db.execute(UserInteraction.__table__.insert(), rows)
+                analytics.record(db, rows)
+                db.commit()
+            self.flushed += len(rows)
+            self.flushes += 1
+        except Exception as e:
+            db.rollback()
+            self.failed += len(rows)
+            print(f"Error writing interaction log: {e}")
+        finally:
+            db.close()
+            self._notify("written", rows)
+
+    def _notify(self, event: str, rows):
+        for listener in self.listeners:
+            try:
+                getattr(listener, event)(rows)
+            except Exception as e:
+                print(f"Error in interaction log listener: {e}")
+
+    def stats(self) -> dict:
+        """Queue depth and row counters"""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+        }
+
+
+interaction_logger = InteractionLogger()
@@ -0,0 +1,84 @@
+"""
+Server-side language detection for chat messages.
+
+Messages in Odia or Devanagari script are identified by counting characters
+in each Unicode block, which is unambiguous. Romanized Hindi and Odia are
+recognised from common function words and verb endings; that is only a
+heuristic, so it is used when the client did not choose a language.
+"""
+import re
+import unicodedata
+from typing import Optional
+
+DEFAULT_LANGUAGE = "en"
+
+# Unicode blocks: Devanagari U+0900-U+097F, Odia U+0B00-U+0B7F
+_DEVANAGARI = ("\u0900", "\u097f")
+_ODIA = ("\u0b00", "\u0b7f")
+
+# Words that are common in romanized text of one language and not English
+# words; see the examples in data/nlu.yml
+ROMANIZED_MARKERS = {
+    "hi": frozenset({
+        "hai", "hain", "mujhe", "mera", "meri", "mere", "kya", "kaise", "kare",
+        "karein", "karne", "karna", "ke", "ki", "ka", "liye", "mein", "nahi",
+        "nahin", "dard", "bukhar", "khansi", "sardhi", "lagi", "zyada",
+        "bachcho", "bachche", "bimari", "kharab",
+    }),
+    "or": frozenset({
+        "achi", "achhi", "acchi", "mo", "moro", "mora", "mote", "kana", "kemiti",
+        "karibi", "jwor", "matharu", "mathaa", "batha", "byatha", "peta",
+        "nakru", "samaye", "hela",
+    }),
+}
+# Odia present-continuous verbs: laguchi, dukhuchi, baharuchi, ...
+_ODIA_SUFFIX = re.compile(r"[a-z]{2,}(?:uchi|ichi)\b")
+_WORD = re.compile(r"[a-z]+")
+
+
+def normalize_message(text: str) -> str:
+    """NFC-normalize a message so equivalent spellings compare equal"""
+    if text.isascii() or unicodedata.is_normalized("NFC", text):
+        return text
+    return unicodedata.normalize("NFC", text)
+
+
+def detect_script(text: str) -> Optional[str]:
+    """"hi" or "or" from the script most of the non-Latin letters are in"""
+    if text.isascii():
+        return None
+    devanagari = odia = 0
+    for char in text:
+        if _ODIA[0] <= char <= _ODIA[1]:
+            odia += 1
+        elif _DEVANAGARI[0] <= char <= _DEVANAGARI[1]:
+            devanagari += 1
+    if not (odia or devanagari):
+        return None
+    return "or" if odia >= devanagari else "hi"
+
+
+def detect_romanized(text: str) -> Optional[str]:
+    """Guess "hi" or "or" for romanized text; None when there is no clear winner"""
+    lowered = text.lower()
+    words = _WORD.findall(lowered)
+    hindi = sum(1 for word in words if word in ROMANIZED_MARKERS["hi"])
+    odia = sum(1 for word in words if word in ROMANIZED_MARKERS["or"])
+    odia += len(_ODIA_SUFFIX.findall(lowered))
+    if hindi > odia:
+        return "hi"
+    if odia > hindi:
+        return "or"
+    return None
+
+
+def detect_language(text: str, requested: Optional[str] = None,
+                    default: Optional[str] = None) -> str:
+    """Effective language of a message.
+
+    The script of the message wins over the requested language; romanized
+    heuristics only apply when no language was requested. default, e.g.
+    the language of the conversation so far, is used when neither decides.
+    """
+    return (detect_script(text) or requested or detect_romanized(text)
+            or default or DEFAULT_LANGUAGE)
@@ -1,24 +1,68 @@
-from fastapi import FastAPI, HTTPException, Depends
-from fastapi.responses import HTMLResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, ConfigDict
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, field_validator
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from database import SessionLocal, HealthContent, UserInteraction, get_db
-from typing import Optional
+from database import engine, get_db, init_db
+from rasa_client import rasa_client
+from circuit_breaker import CircuitOpenError, CLOSED, HALF_OPEN, OPEN
+from interaction_log import interaction_logger
+from fallback import fallback_engine
+from content_cache import health_content_cache
+from response_cache import response_cache
+from language import detect_language, normalize_message
+from nlu import nlu_fast_path
+from sessions import extract_age, session_store
+from rate_limit import AdmissionMiddleware, admission_controller, rate_limiter
+from shared_state import shared_state
+import metrics
+from static_assets import asset_store
+from stats_feed import STATS_KEEPALIVE, stats_feed
+from metrics import TimingMiddleware, stage
+import analytics
+from contextlib import asynccontextmanager
+from typing import List, Optional
+import asyncio
+import math
 import os
-import requests
+import httpx
 import json
 
-app = FastAPI(title="Ama Arogya - Public Health Chatbot API", version="1.0.0")
+# Batch endpoint limits
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "500"))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "16"))
 
-# Mount static files for frontend
-frontend_path = os.path.join(os.path.dirname(__file__), "frontend")
-if os.path.exists(frontend_path):
-    app.mount("/static", StaticFiles(directory=frontend_path), name="static")
 
-# Rasa server configuration
-RASA_API_URL = "http://localhost:5005"
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # With several workers starting at once, one at a time creates the schema
+    with shared_state.lock("startup", timeout=120):
+        init_db()
+        analytics.ensure_built()
+    # Share one pooled Rasa connection across all requests
+    await rasa_client.start()
+    await interaction_logger.start()
+    await session_store.start()
+    health_content_cache.preload()
+    asset_store.load()
+    await stats_feed.start()
+    yield
+    await stats_feed.stop()
+    await session_store.stop()
+    await interaction_logger.stop()
+    await rasa_client.close()
+
+
+# Dashboards get live figures from logged interactions
+interaction_logger.listeners.append(stats_feed)
+
+app = FastAPI(title="Ama Arogya - Public Health Chatbot API",
+              version="1.0.0", lifespan=lifespan)
+
+# Shed chat traffic beyond what Rasa and the log writer can keep up with
+app.add_middleware(AdmissionMiddleware, controller=admission_controller,
+                   paths=["/chat", "/chat/stream", "/chat/batch"])
+# Outermost, so queueing for admission counts towards request latency
+app.add_middleware(TimingMiddleware)
 
 
 class ChatRequest(BaseModel):
@@ -28,6 +72,24 @@ class ChatRequest(BaseModel):
     sender_id: str
     language: Optional[str] = "en"
 
+    @field_validator("message")
+    @classmethod
+    def normalize(cls, message: str) -> str:
+        return normalize_message(message)
+
+    def effective_language(self, default: Optional[str] = None) -> str:
+        """The message's language; a client-chosen one is trusted unless the
+        message is written in another script. default, the conversation's
+        language, is used when the message itself does not tell"""
+        requested = self.language if "language" in self.model_fields_set else None
+        return detect_language(self.message, requested, default)
+
+
+class BotMessage(BaseModel):
+    text: Optional[str] = None
+    image: Optional[str] = None
+    buttons: Optional[List[dict]] = None
+
 
 class ChatResponse(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -35,141 +97,330 @@ class ChatResponse(BaseModel):
     response: str
     language: str
     intent: Optional[str] = None
+    messages: List[BotMessage] = []
+
+
+class BatchChatRequest(BaseModel):
+    messages: List[ChatRequest]
+
+
+class BatchChatResponse(BaseModel):
+    responses: List[ChatResponse]
 
 
 def get_health_content(topic: str, language: str, db: Session):
-    """Get health content from database"""
-    content = db.query(HealthContent).filter(
-        HealthContent.topic == topic,
-        HealthContent.language == language
-    ).first()
-    return content
-
-
-def log_interaction(sender_id: str, message: str, response: str, intent: str, language: str, db: Session):
-    """Log user interaction"""
-    interaction = UserInteraction(
-        sender_id=sender_id,
-        message=message,
-        response=response,
-        intent=intent,
-        language=language
-    )
-    db.add(interaction)
-    db.commit()
+    """Get health content, from the cache when possible"""
+    return health_content_cache.get(topic, language, db)
 
 
-async def get_rasa_response(message: str, sender_id: str):
-    """Get response from Rasa server"""
-    try:
-        rasa_payload = {
-            "sender": sender_id,
-            "message": message
-        }
-
-        response = requests.post(
-            f"{RASA_API_URL}/webhooks/rest/webhook",
-            json=rasa_payload,
-            timeout=10
-        )
-
-        if response.status_code == 200:
-            rasa_responses = response.json()
-            if rasa_responses and len(rasa_responses) > 0:
-                # Get the first response from Rasa
-                return rasa_responses[0].get("text", "I'm sorry, I couldn't understand that.")
-            else:
-                return "I'm sorry, I couldn't understand that. Please ask about health-related topics."
-        else:
-            return None
+async def log_interaction(sender_id: str, message: str, response: str, intent: str, language: str):
+    """Queue user interaction for the background log writer"""
+    with stage("log"):
+        await interaction_logger.log(sender_id, message, response, intent, language)
+
+
+RASA_ERRORS = metrics.registry.counter(
+    "rasa_errors_total", "Rasa calls that failed, by reason", ["reason"])
+CHAT_REPLIES = metrics.registry.counter(
+    "chat_replies_total", "Chat replies by source: rasa, fast_path, fallback or cache",
+    ["source"])
+
+
+def rasa_error_reason(error: Exception) -> str:
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(error, httpx.HTTPStatusError):
+        return "status"
+    if isinstance(error, httpx.HTTPError):
+        return "connection"
+    return "invalid_response"
+
 
-    except requests.exceptions.RequestException as e:
+NOT_UNDERSTOOD = "I'm sorry, I couldn't understand that. Please ask about health-related topics."
+
+
+def bot_message(rasa_message: dict) -> dict:
+    """Keep the parts of a Rasa bot message the clients can render"""
+    return {key: rasa_message[key] for key in ("text", "image", "buttons")
+            if rasa_message.get(key)}
+
+
+def join_text(messages: List[dict]) -> str:
+    """Combine the text of several bot messages into one reply"""
+    texts = [m["text"] for m in messages if m.get("text")]
+    return "\n\n".join(texts) if texts else "I'm sorry, I couldn't understand that."
+
+
+async def get_rasa_messages(message: str, sender_id: str, language: str = None):
+    """Get every bot message for this turn from Rasa, or None if unavailable"""
+    try:
+        with stage("rasa"):
+            rasa_responses = await rasa_client.send_message(
+                message, sender_id, metadata={"language": language} if language else None)
+    except CircuitOpenError as e:
+        # Rasa is known to be down; go straight to the fallback
+        RASA_ERRORS.inc((rasa_error_reason(e),))
+        return None
+    except (httpx.HTTPError, ValueError) as e:
         print(f"Error connecting to Rasa: {e}")
+        RASA_ERRORS.inc((rasa_error_reason(e),))
         return None
 
+    messages = [bot_message(m) for m in rasa_responses]
+    return [m for m in messages if m] or [{"text": NOT_UNDERSTOOD}]
 
-def get_fallback_response(message: str, language: str):
-    """Fallback responses when Rasa is not available"""
-    message_lower = message.lower()
-
-    # Check for specific topics and provide fallback responses
-    if any(word in message_lower for word in ["fever", "ज्वर", "ଜ୍ବର", "jwor", "bukhar"]):
-        if language == "hi":
-            return "बुखार के लिए पर्याप्त आराम लें और हाइड्रेटेड रहें। यदि बुखार 3 दिनों से अधिक समय तक बना रहता है तो डॉक्टर से संपर्क करें।"
-        elif language == "or":
-            return "ଜ୍ବର ପାଇଁ ଯଥେଷ୍ଟ ବିଶ୍ରାମ ନିଅନ୍ତୁ ଏବଂ ପାଣି ପିଅନ୍ତୁ। ଯଦି ଜ୍ବର 3 ଦିନରୁ ଅଧିକ ସମୟ ପାଇଁ ରହିଥାଏ ତେବେ ଡାକ୍ତରଙ୍କ ସହିତ ଯୋଗାଯୋଗ କରନ୍ତୁ।"
-        else:
-            return "For fever, take adequate rest and stay hydrated. If fever persists for more than 3 days, consult a doctor."
 
-    elif any(word in message_lower for word in ["headache", "सिरदर्द", "ମାଥା ବଥା", "matharu batha"]):
-        if language == "hi":
-            return "सिरदर्द के लिए आराम और ठंडी पट्टी सहायक होती है।"
-        elif language == "or":
-            return "ମାଥା ବଥା ପାଇଁ ବିଶ୍ରାମ ଓ ଠଣ୍ଡା ସେକ ସାହାଯ୍ୟକାରୀ।"
-        else:
-            return "For headache, rest in a dark room and apply cold compress."
+async def get_rasa_response(message: str, sender_id: str):
+    """Get response from Rasa server"""
+    messages = await get_rasa_messages(message, sender_id)
+    return join_text(messages) if messages is not None else None
 
-    elif any(word in message_lower for word in ["pregnancy", "maternal", "गर्भावस्था", "ଗର୍ଭାବସ୍ଥା"]):
-        if language == "hi":
-            return "गर्भावस्था के दौरान नियमित जांच और संतुलित आहार महत्वपूर्ण है।"
-        elif language == "or":
-            return "ଗର୍ଭାବସ୍ଥା ସମୟରେ ନିୟମିତ ଯାଞ୍ଚ ଏବଂ ସନ୍ତୁଲିତ ଆହାର ଗୁରୁତ୍ୱପୂର୍ଣ୍ଣ।"
-        else:
-            return "During pregnancy, regular check-ups and balanced diet are important."
 
-    elif any(word in message_lower for word in ["vaccination", "टीका", "ଟୀକା", "tikakaran"]):
-        if language == "hi":
-            return "टीकाकरण बच्चों के स्वास्थ्य के लिए महत्वपूर्ण है। नियमित टीकाकरण कार्यक्रम का पालन करें।"
-        elif language == "or":
-            return "ଟୀକାକରଣ ପିଲାମାନଙ୍କ ସ୍ୱାସ୍ଥ୍ୟ ପାଇଁ ଗୁରୁତ୍ୱପୂର୍ଣ୍ଣ। ନିୟମିତ ଟୀକାକରଣ କାର୍ଯ୍ୟକ୍ରମର ଅନୁସରଣ କରନ୍ତୁ।"
-        else:
-            return "Vaccination is important for children's health. Follow the regular vaccination schedule."
+def get_fast_path_messages(message: str):
+    """Bot messages for a simple, context-free message, or None to ask Rasa"""
+    with stage("nlu"):
+        answer = nlu_fast_path.answer(message)
+    return answer[1] if answer else None
 
-    elif any(word in message_lower for word in ["hello", "hi", "namaste", "ନମସ୍କାର", "namaskar"]):
-        if language == "hi":
-            return "नमस्ते! मैं अमा आरोग्य हूं, आपका स्वास्थ्य सहायक। आपकी कैसे मदद कर सकता हूं?"
-        elif language == "or":
-            return "ନମସ୍କାର! ମୁଁ ଅମା ଆରୋଗ୍ୟ, ଆପଣଙ୍କର ସ୍ୱାସ୍ଥ୍ୟ ସହାୟକ। ମୁଁ ଆପଣଙ୍କୁ କିପରି ସାହାଯ୍ୟ କରିପାରେ?"
-        else:
-            return "Hello! I'm Ama Arogya, your health assistant. How can I help you today?"
 
+def get_fallback_response(message: str, language: str, session=None):
+    """Fallback responses when Rasa is not available"""
+    with stage("fallback"):
+        # The domain's own reply if the intent is clear enough, else keywords,
+        # else the topic the sender was asking about
+        answer = nlu_fast_path.answer(message, rasa_available=False)
+        if answer:
+            return join_text(answer[1])
+        context = session.slots.get("symptom") if session is not None else None
+        topic, response = fallback_engine.respond(message, language, context)
+    return response
+
+
+def cache_topic(message: str) -> Optional[str]:
+    """Topic a message is a stateless question about, or None.
+
+    Greetings and other topics marked "remember": false do not count: a
+    message that only matched those, such as "hi, which one?", may be a
+    reply within the conversation.
+    """
+    topic = fallback_engine.match(message)
+    return topic if topic in fallback_engine.context_topics else None
+
+
+async def remember_turn(session, message: str, response: str, language: str):
+    """Add this turn, and the topic and age it mentions, to the sender's session"""
+    with stage("session"):
+        slots = {}
+        topic = fallback_engine.match(message)
+        if topic in fallback_engine.context_topics:
+            slots["symptom"] = topic
+        age = extract_age(message)
+        if age is not None:
+            slots["age"] = age
+        await session_store.record(session, message, response, language, slots)
+
+
+async def check_rate_limit(http_request: Request, sender_id: Optional[str]):
+    """Raise 429 if this sender or client IP is over its rate limit"""
+    client_ip = http_request.client.host if http_request.client else None
+    retry_after = await rate_limiter.check_async(sender_id, client_ip)
+    if retry_after:
+        raise HTTPException(
+            status_code=429, detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(retry_after))})
+
+
+async def process_message(message: str, sender_id: str, language: str, session=None):
+    """Answer one message; returns (response, intent, messages, cache_status)"""
+    messages = get_fast_path_messages(message)
+    if messages is not None:
+        CHAT_REPLIES.inc(("fast_path",))
+        return join_text(messages), "fast_path", messages, "BYPASS"
+
+    # Stateless questions may already have been answered for another sender
+    cacheable = response_cache.cacheable(cache_topic(message))
+    cached = response_cache.get(message, language) if cacheable else None
+    if cached:
+        response, intent, messages = cached
+        CHAT_REPLIES.inc(("cache",))
+        return response, intent, messages, "HIT"
+
+    # Try to get response from Rasa first
+    messages = await get_rasa_messages(message, sender_id, language)
+
+    if messages is not None:
+        response = join_text(messages)
+        intent = "rasa_processed"
+        if cacheable:
+            response_cache.put(message, language, response, intent, messages)
     else:
-        if language == "hi":
-            return "मैं आपकी मदद करने के लिए यहाँ हूँ। कृपया स्वास्थ्य संबंधी प्रश्न पूछें।"
-        elif language == "or":
-            return "ମୁଁ ଆପଣଙ୍କୁ ସାହାଯ୍ୟ କରିବା ପାଇଁ ଏଠାରେ ଅଛି। ଦୟାକରି ସ୍ୱାସ୍ଥ୍ୟ ସମ୍ବନ୍ଧୀୟ ପ୍ରଶ୍ନ ପଚାରନ୍ତୁ।"
-        else:
-            return "I'm here to help you with health-related questions. Please ask about symptoms, treatments, or health advice."
+        # Fall back to hardcoded responses if Rasa is unavailable
+        response = get_fallback_response(message, language, session)
+        intent = "fallback"
+        messages = [{"text": response}]
+
+    CHAT_REPLIES.inc(("rasa" if intent == "rasa_processed" else "fallback",))
+    return response, intent, messages, "MISS" if cacheable else "BYPASS"
 
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest, db: Session = Depends(get_db)):
+async def chat(request: ChatRequest, http_request: Request):
     """
     Handle chatbot messages using Rasa model with fallback
     """
+    await check_rate_limit(http_request, request.sender_id)
     message = request.message
-    language = request.language
     sender_id = request.sender_id
+    session = await session_store.get(sender_id)
+    language = request.effective_language(session.language)
 
-    # Try to get response from Rasa first
-    rasa_response = await get_rasa_response(message, sender_id)
-
-    if rasa_response:
-        response = rasa_response
-        intent = "rasa_processed"
-    else:
-        # Fall back to hardcoded responses if Rasa is unavailable
-        response = get_fallback_response(message, language)
-        intent = "fallback"
+    response, intent, messages, cache_status = await process_message(
+        message, sender_id, language, session)
+    headers = {"X-Cache": cache_status} if response_cache.enabled else None
 
+    await remember_turn(session, message, response, language)
     # Log the interaction
-    log_interaction(sender_id, message, response, intent, language, db)
+    await log_interaction(sender_id, message, response, intent, language)
+
+    # Serialized here rather than by FastAPI so it can be timed
+    with stage("serialize"):
+        body = ChatResponse(
+            response=response,
+            language=language,
+            intent=intent,
+            messages=messages
+        ).model_dump_json()
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Stream the bot's messages as newline-delimited JSON.
+
+    Each bot message is sent as soon as Rasa emits it, as a line of the form
+    {"type": "message", "text": ...}; the last line is
+    {"type": "done", "intent": ..., "language": ...}.
+    """
+    await check_rate_limit(http_request, request.sender_id)
+    message = request.message
+    sender_id = request.sender_id
+    session = await session_store.get(sender_id)
+    language = request.effective_language(session.language)
+
+    def line(payload: dict) -> str:
+        return json.dumps(payload, ensure_ascii=False) + "\n"
+
+    async def events():
+        messages = get_fast_path_messages(message)
+        cacheable = messages is None and response_cache.cacheable(cache_topic(message))
+        cached = response_cache.get(message, language) if cacheable else None
+
+        if messages is not None:
+            response, intent = join_text(messages), "fast_path"
+            CHAT_REPLIES.inc(("fast_path",))
+            for item in messages:
+                yield line({"type": "message", **item})
+        elif cached:
+            response, intent, messages = cached
+            CHAT_REPLIES.inc(("cache",))
+            for item in messages:
+                yield line({"type": "message", **item})
+        else:
+            messages = []
+            intent = "rasa_processed"
+            try:
+                with stage("rasa"):
+                    async for rasa_message in rasa_client.stream_messages(
+                            message, sender_id, metadata={"language": language}):
+                        item = bot_message(rasa_message)
+                        if item:
+                            messages.append(item)
+                            yield line({"type": "message", **item})
+            except CircuitOpenError as e:
+                RASA_ERRORS.inc((rasa_error_reason(e),))
+                intent = "fallback"
+            except (httpx.HTTPError, ValueError) as e:
+                print(f"Error connecting to Rasa: {e}")
+                RASA_ERRORS.inc((rasa_error_reason(e),))
+                intent = "fallback"
+
+            if intent == "fallback" and not messages:
+                # Nothing reached the client yet, so answer from the fallback
+                messages = [{"text": get_fallback_response(message, language, session)}]
+                yield line({"type": "message", **messages[0]})
+            elif not messages:
+                messages = [{"text": NOT_UNDERSTOOD}]
+                yield line({"type": "message", **messages[0]})
+
+            response = join_text(messages)
+            CHAT_REPLIES.inc(("rasa" if intent == "rasa_processed" else "fallback",))
+            if cacheable and intent == "rasa_processed":
+                response_cache.put(message, language, response, intent, messages)
+
+        # Before the last line: a client that leaves once it has read it
+        # cancels the rest of this generator
+        await remember_turn(session, message, response, language)
+        await log_interaction(sender_id, message, response, intent, language)
+        yield line({"type": "done", "intent": intent, "language": language})
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@app.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_batch(request: BatchChatRequest, http_request: Request):
+    """
+    Handle a burst of messages from a gateway in one call.
 
-    return ChatResponse(
-        response=response,
-        language=language,
-        intent=intent
-    )
+    Messages from different senders are answered concurrently, at most
+    BATCH_MAX_WORKERS at a time; messages from the same sender are answered
+    one after another in the order given. Responses are returned in input
+    order and all interactions are logged in one transaction.
+
+    A batch counts as one request against the client IP's rate limit;
+    per-sender limits are left to the gateway.
+    """
+    if len(request.messages) > BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413, detail=f"At most {BATCH_MAX_SIZE} messages per batch")
+    await check_rate_limit(http_request, None)
+
+    results = [None] * len(request.messages)
+    by_sender = {}
+    for index, item in enumerate(request.messages):
+        by_sender.setdefault(item.sender_id, []).append(index)
+
+    workers = asyncio.Semaphore(BATCH_MAX_WORKERS)
+
+    async def answer_sender(indices):
+        session = await session_store.get(request.messages[indices[0]].sender_id)
+        for index in indices:
+            item = request.messages[index]
+            language = item.effective_language(session.language)
+            async with workers:
+                response, intent, messages, _ = await process_message(
+                    item.message, item.sender_id, language, session)
+            await remember_turn(session, item.message, response, language)
+            results[index] = ChatResponse(
+                response=response, language=language, intent=intent,
+                messages=messages)
+
+    await asyncio.gather(*(answer_sender(indices) for indices in by_sender.values()))
+
+    with stage("log"):
+        await interaction_logger.log_many([{
+            "sender_id": item.sender_id,
+            "message": item.message,
+            "response": result.response,
+            "intent": result.intent,
+            "language": result.language,
+        } for item, result in zip(request.messages, results)])
+
+    with stage("serialize"):
+        body = BatchChatResponse(responses=results).model_dump_json()
+    return Response(body, media_type="application/json")
 
 
 @app.get("/health")
@@ -177,7 +428,73 @@ async def health():
     """
     Health check endpoint
     """
-    return {"status": "healthy"}
+    rasa_circuit = rasa_client.breaker.stats()
+    return {
+        "status": "degraded" if rasa_circuit["state"] == OPEN else "healthy",
+        "rasa_circuit": rasa_circuit,
+        "interaction_log": interaction_logger.stats(),
+        "content_cache": health_content_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "admission": admission_controller.stats(),
+        "stats_feed": stats_feed.stats(),
+        "nlu_fast_path": nlu_fast_path.stats(),
+        "sessions": session_store.stats(),
+        "shared_state": await asyncio.to_thread(shared_state.stats)
+    }
+
+
+def db_pool_usage() -> dict:
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return {}
+    return {("size",): pool.size(), ("checked_out",): pool.checkedout(),
+            ("overflow",): pool.overflow()}
+
+
+def state_flags(current: str, states) -> dict:
+    return {(state,): int(state == current) for state in states}
+
+
+metrics.registry.callback(
+    "db_pool_connections", "Database connection pool size and usage",
+    db_pool_usage, ["state"])
+metrics.registry.callback(
+    "interaction_log_queue_depth", "Interaction batches waiting for the log writer",
+    lambda: interaction_logger.stats()["queue_depth"])
+metrics.registry.callback(
+    "interaction_log_rows_total", "Interaction rows by outcome",
+    lambda: {(key,): value for key, value in interaction_logger.stats().items()
+             if key in ("flushed", "dropped", "failed")},
+    ["outcome"], type="counter")
+metrics.registry.callback(
+    "rasa_circuit_state", "1 for the current state of the Rasa circuit breaker",
+    lambda: state_flags(rasa_client.breaker.state, (CLOSED, OPEN, HALF_OPEN)),
+    ["state"])
+metrics.registry.callback(
+    "response_cache_lookups_total", "Response cache lookups by result",
+    lambda: {("hit",): response_cache.hits, ("miss",): response_cache.misses},
+    ["result"], type="counter")
+metrics.registry.callback(
+    "sessions_in_memory_bytes", "Estimated memory held by conversation sessions",
+    lambda: session_store.stats()["memory_bytes"])
+metrics.registry.callback(
+    "chat_requests_in_flight", "Chat requests being processed",
+    lambda: admission_controller.in_flight)
+metrics.registry.callback(
+    "chat_requests_shed_total", "Chat requests rejected with 503 by admission control",
+    lambda: admission_controller.shed, type="counter")
+metrics.registry.callback(
+    "chat_requests_rate_limited_total", "Chat requests rejected with 429",
+    lambda: rate_limiter.limited, type="counter")
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Metrics in the Prometheus text format
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
 
 
 @app.get("/stats")
@@ -185,35 +502,68 @@ async def get_stats(db: Session = Depends(get_db)):
     """
     Get basic statistics
     """
-    total_interactions = db.query(UserInteraction).count()
-    language_stats = db.query(UserInteraction.language, func.count(
-        UserInteraction.id)).group_by(UserInteraction.language).all()
+    return analytics.get_stats(db)
 
-    return {
-        "total_interactions": total_interactions,
-        "language_distribution": dict(language_stats)
-    }
+
+@app.get("/stats/stream")
+async def stats_stream():
+    """
+    Live statistics as Server-Sent Events.
+
+    The first event is a snapshot with the same fields as /stats; after
+    that, "delta" events carry the counts added since the previous event.
+    Both also carry the fallback rate and the recent mean Rasa latency.
+    """
+    queue = stats_feed.subscribe()
+
+    async def events():
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), STATS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    return
+                yield f"data: {json.dumps(message, ensure_ascii=False)}\n\n"
+        finally:
+            stats_feed.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @app.get("/dashboard", response_class=HTMLResponse)
-async def get_dashboard():
+async def get_dashboard(request: Request):
     """
     Serve the analytics dashboard
     """
-    with open("dashboard.html", "r", encoding="utf-8") as f:
-        return f.read()
+    page = asset_store.page("dashboard")
+    if page is None:
+        return HTMLResponse("Dashboard not found.", status_code=404)
+    return page.response(request)
 
 
 @app.get("/", response_class=HTMLResponse)
 @app.get("/demo", response_class=HTMLResponse)
-async def get_demo():
+async def get_demo(request: Request):
     """
     Serve the demo frontend interface
     """
-    frontend_file = os.path.join(os.path.dirname(
-        __file__), "frontend", "index.html")
-    if os.path.exists(frontend_file):
-        with open(frontend_file, "r", encoding="utf-8") as f:
-            return f.read()
+    page = asset_store.page("demo")
+    if page is not None:
+        return page.response(request)
     else:
         return HTMLResponse("Demo frontend not found. Please ensure frontend files are in the 'frontend' directory.", status_code=404)
+
+
+@app.get("/static/{path:path}", include_in_schema=False)
+async def get_static(path: str, request: Request):
+    """
+    Serve the frontend's CSS, JavaScript and images
+    """
+    response = asset_store.static_response(request, path)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return response
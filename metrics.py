@@ -0,0 +1,253 @@
+"""
+In-process metrics in the Prometheus text format, and per-request timing.
+
+Counters and histograms are kept in memory and rendered by GET /metrics.
+Code that handles a request wraps each stage (Rasa call, fallback, log
+write, serialization) in `stage(name)`; the duration goes to the
+chat_stage_seconds histogram and to the current request's timings, which
+TimingMiddleware returns in a Server-Timing header.
+"""
+import bisect
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from starlette.datastructures import MutableHeaders
+
+METRICS_TIMING_HEADER = os.getenv("METRICS_TIMING_HEADER", "true").lower() in ("1", "true", "yes")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per combination of label values"""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Tuple[str, ...] = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram:
+    """Bucketed observations per combination of label values"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket (last is +Inf), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def count(self, labels: Tuple[str, ...] = ()) -> int:
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry else 0
+
+    def totals(self, labels: Tuple[str, ...] = ()) -> Tuple[int, float]:
+        """(observation count, sum of observed values)"""
+        with self._lock:
+            entry = self._values.get(labels)
+            return (sum(entry[0]), entry[1]) if entry else (0, 0.0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((labels, (list(counts), total))
+                            for labels, (counts, total) in self._values.items())
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _labels(self.labelnames, labels, 'le="%s"' % le)
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class CallbackMetric:
+    """A value read from another component when the metrics are rendered.
+
+    `read` returns a number, or a dict of label values to numbers.
+    """
+
+    def __init__(self, name: str, help: str, read: Callable, labelnames: Sequence[str] = (),
+                 type: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.labelnames = tuple(labelnames)
+        self.type = type
+
+    def samples(self):
+        try:
+            value = self.read()
+        except Exception as e:
+            print(f"Error reading metric {self.name}: {e}")
+            return
+        values = value if isinstance(value, dict) else {(): value}
+        for labels, number in sorted(values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(number)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name: str, help: str, read: Callable, labelnames: Sequence[str] = (),
+                 type: str = "gauge") -> CallbackMetric:
+        return self._add(CallbackMetric(name, help, read, labelnames, type))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by method, path and status",
+    ["method", "path", "status"])
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "Time to send response headers, by path", ["path"])
+STAGE_SECONDS = registry.histogram(
+    "chat_stage_seconds", "Time spent in each stage of answering a chat message", ["stage"])
+
+_timings: ContextVar[Optional[dict]] = ContextVar("request_timings", default=None)
+
+
+class stage:
+    """Time a `with` block as stage `name` of the current request"""
+
+    __slots__ = ("labels", "start")
+
+    def __init__(self, name: str):
+        self.labels = (name,)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(elapsed, self.labels)
+        timings = _timings.get()
+        if timings is not None:
+            name = self.labels[0]
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def server_timing(timings: dict) -> str:
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items())
+
+
+class TimingMiddleware:
+    """ASGI middleware counting requests and timing them.
+
+    The stages timed while handling a request, plus the total, are sent in a
+    Server-Timing header (when `header` is set). Stages of a streamed
+    response that run after the headers are sent only reach the histograms.
+    """
+
+    def __init__(self, app, header: bool = METRICS_TIMING_HEADER):
+        self.app = app
+        self.header = header
+
+    @staticmethod
+    def route_path(scope) -> str:
+        """The matched route's path template, e.g. /static/{path:path}"""
+        # Set by FastAPI's router; routes sharing an endpoint keep their own path
+        route = scope.get("route")
+        return route.path if route is not None else "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timings = {}
+        token = _timings.set(timings)
+        status = 500
+        elapsed = None
+
+        async def send_with_timing(message):
+            nonlocal status, elapsed
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - start
+                if self.header:
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing", server_timing({**timings, "total": elapsed}))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            path = self.route_path(scope)
+            if elapsed is None:
+                elapsed = time.perf_counter() - start
+            HTTP_REQUESTS.inc((scope["method"], path, str(status)))
+            HTTP_REQUEST_SECONDS.observe(elapsed, (path,))
@@ -0,0 +1,283 @@
+"""
+In-process intent classification for answering simple messages without Rasa.
+
+An IntentClassifier is built at startup from the Rasa training examples
+(data/nlu.yml and data/health/*.yml). Messages are represented like Rasa's
+char_wb featurizer does: character 3-4-grams within word boundaries plus
+whole words, weighted by TF-IDF. A message gets the intent of the most
+similar training example (cosine similarity), scored through an inverted
+index so only examples sharing a feature with the message are touched.
+
+NLUFastPath answers a message from the domain.yml responses when the
+classifier is confident and the intent always gets the same responses no
+matter what came before: it has a rule in data/rules.yml, or only ever
+opens a story. Everything else (follow-ups such as "yes", intents answered
+by custom actions, unclear messages) goes to Rasa. Like a response cache
+hit, a fast-path answer skips Rasa, so the sender's Rasa tracker does not
+see that turn.
+
+Reading the training data needs PyYAML, which is installed with Rasa; without
+it the fast path is disabled.
+"""
+import functools
+import glob
+import math
+import os
+import random
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fallback import normalize_text
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+NLU_FAST_PATH_ENABLED = os.getenv("NLU_FAST_PATH_ENABLED", "true").lower() in ("1", "true", "yes")
+# Similarity to the closest training example needed to skip Rasa
+NLU_FAST_PATH_THRESHOLD = float(os.getenv("NLU_FAST_PATH_THRESHOLD", "0.9"))
+# Required lead over the closest example of any other intent
+NLU_FAST_PATH_MARGIN = float(os.getenv("NLU_FAST_PATH_MARGIN", "0.1"))
+# Similarity needed to answer from the domain when Rasa is unavailable
+NLU_FALLBACK_THRESHOLD = float(os.getenv("NLU_FALLBACK_THRESHOLD", "0.5"))
+NLU_DATA_PATHS = os.getenv(
+    "NLU_DATA_PATHS",
+    ",".join([os.path.join(BASE_DIR, "data", "nlu.yml"),
+              os.path.join(BASE_DIR, "data", "health", "*.yml")]))
+NLU_DOMAIN_PATH = os.getenv("NLU_DOMAIN_PATH", os.path.join(BASE_DIR, "domain.yml"))
+NLU_RULES_PATH = os.getenv("NLU_RULES_PATH", os.path.join(BASE_DIR, "data", "rules.yml"))
+NLU_STORIES_PATH = os.getenv("NLU_STORIES_PATH", os.path.join(BASE_DIR, "data", "stories.yml"))
+
+# Bigrams occur in most examples; dropping them halves the scoring time
+# without changing leave-one-out accuracy on the training data
+NGRAM_SIZES = (3, 4)
+CLASSIFY_CACHE_SIZE = 4096
+
+
+def tokenize(text: str) -> List[str]:
+    """Case-folded words with punctuation and symbols removed"""
+    text = normalize_text(text)
+    if not text.isascii() or not text.isalnum():
+        text = "".join(" " if unicodedata.category(c)[0] in "PSZ" else c for c in text)
+    return text.split()
+
+
+def features(text: str) -> Counter:
+    """Word and within-word character n-gram counts"""
+    counts = Counter()
+    for word in tokenize(text):
+        counts["w:" + word] += 1
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                counts[padded[i:i + n]] += 1
+    return counts
+
+
+class IntentClassifier:
+    """Nearest-example intent classifier over TF-IDF weighted n-grams"""
+
+    def __init__(self, examples: Iterable[Tuple[str, str]]):
+        self.intents: List[str] = []
+        self.texts: List[str] = []
+        example_features = []
+        for intent, text in examples:
+            counts = features(text)
+            if counts:
+                self.intents.append(intent)
+                self.texts.append(text)
+                example_features.append(counts)
+
+        total = len(example_features)
+        document_frequency = Counter()
+        for counts in example_features:
+            document_frequency.update(counts.keys())
+        self.idf = {feature: math.log((1 + total) / (1 + df)) + 1
+                    for feature, df in document_frequency.items()}
+        # Features the training data never contains still count towards the norm
+        self.unseen_idf = math.log(1 + total) + 1
+
+        # feature -> [(example index, weight)]
+        self._postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for index, counts in enumerate(example_features):
+            for feature, weight in self._weights(counts).items():
+                self._postings[feature].append((index, weight))
+        self._postings = dict(self._postings)
+
+    def _weights(self, counts: Counter) -> Dict[str, float]:
+        """L2-normalized sublinear TF-IDF weights"""
+        weights = {feature: (1 + math.log(count)) * self.idf.get(feature, self.unseen_idf)
+                   for feature, count in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {feature: w / norm for feature, w in weights.items()}
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Highest similarity to any training example, by intent"""
+        postings = self._postings
+        similarity = defaultdict(float)
+        for feature, weight in self._weights(features(text)).items():
+            for index, example_weight in postings.get(feature, ()):
+                similarity[index] += weight * example_weight
+
+        best = {}
+        for index, score in similarity.items():
+            intent = self.intents[index]
+            if score > best.get(intent, 0.0):
+                best[intent] = score
+        return best
+
+    def classify(self, text: str) -> Tuple[Optional[str], float, float]:
+        """(intent, confidence, lead over the next intent); intent is None if
+        the message shares nothing with the training data"""
+        ranked = sorted(self.scores(text).items(), key=lambda item: item[1], reverse=True)
+        if not ranked:
+            return None, 0.0, 0.0
+        intent, confidence = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        return intent, confidence, confidence - runner_up
+
+
+def _load_yaml(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def _expand(paths: str) -> List[str]:
+    files = []
+    for pattern in paths.split(","):
+        files.extend(sorted(glob.glob(pattern.strip())))
+    return files
+
+
+def training_examples(paths: str = NLU_DATA_PATHS) -> List[Tuple[str, str]]:
+    """(intent, example) pairs from Rasa NLU files"""
+    examples = []
+    for path in _expand(paths):
+        for item in _load_yaml(path).get("nlu") or []:
+            if "intent" not in item:
+                continue
+            for line in (item.get("examples") or "").splitlines():
+                line = line.strip()
+                if line.startswith("- "):
+                    examples.append((item["intent"], line[2:].strip()))
+    return examples
+
+
+def _turns(steps: List[dict]) -> List[Tuple[str, Tuple[str, ...]]]:
+    """(intent, actions that follow it) for each user turn of a story or rule"""
+    turns = []
+    for step in steps:
+        if "intent" in step:
+            turns.append((step["intent"], []))
+        elif "action" in step and turns:
+            turns[-1][1].append(step["action"])
+    return [(intent, tuple(actions)) for intent, actions in turns]
+
+
+def context_free_actions(rules: List[dict], stories: List[dict]) -> Dict[str, Tuple[str, ...]]:
+    """Intents whose reply never depends on the conversation so far, with the
+    actions that reply to them.
+
+    That is intents with a one-turn rule, and intents that only ever open a
+    story, provided every occurrence is answered the same way.
+    """
+    replies = defaultdict(set)
+    context_free = set()
+    for rule in rules:
+        if rule.get("condition") or rule.get("conversation_start") is False:
+            continue
+        turns = _turns(rule.get("steps") or [])
+        if len(turns) == 1:
+            context_free.add(turns[0][0])
+    openers, followers = set(), set()
+    for flow in list(rules) + list(stories):
+        for position, (intent, actions) in enumerate(_turns(flow.get("steps") or [])):
+            replies[intent].add(actions)
+            (followers if position else openers).add(intent)
+    context_free |= openers - followers
+    return {intent: next(iter(replies[intent])) for intent in context_free
+            if len(replies[intent]) == 1 and next(iter(replies[intent]))}
+
+
+class NLUFastPath:
+    """Answers confidently classified, context-free messages from the domain"""
+
+    def __init__(self, classifier: Optional[IntentClassifier],
+                 replies: Dict[str, List[dict]],
+                 enabled: bool = NLU_FAST_PATH_ENABLED,
+                 threshold: float = NLU_FAST_PATH_THRESHOLD,
+                 margin: float = NLU_FAST_PATH_MARGIN,
+                 fallback_threshold: float = NLU_FALLBACK_THRESHOLD):
+        self.classifier = classifier
+        # intent -> response templates of each action in the reply
+        self.replies = replies
+        self.enabled = enabled and classifier is not None and bool(replies)
+        self.threshold = threshold
+        self.margin = margin
+        self.fallback_threshold = fallback_threshold
+        # Greetings and the like are sent over and over
+        self._classify = functools.lru_cache(CLASSIFY_CACHE_SIZE)(
+            classifier.classify) if classifier is not None else None
+        self.answered = 0
+        self.deferred = 0
+
+    @classmethod
+    def from_files(cls, nlu_paths: str = NLU_DATA_PATHS, domain_path: str = NLU_DOMAIN_PATH,
+                   rules_path: str = NLU_RULES_PATH, stories_path: str = NLU_STORIES_PATH,
+                   **kwargs) -> "NLUFastPath":
+        if yaml is None:
+            print("PyYAML is not installed; the NLU fast path is disabled")
+            return cls(None, {}, **kwargs)
+        try:
+            domain = _load_yaml(domain_path)
+            rules = _load_yaml(rules_path).get("rules") or []
+            stories = _load_yaml(stories_path).get("stories") or []
+            classifier = IntentClassifier(training_examples(nlu_paths))
+        except (OSError, yaml.YAMLError) as e:
+            print(f"Error loading NLU training data, fast path disabled: {e}")
+            return cls(None, {}, **kwargs)
+
+        responses = domain.get("responses") or {}
+        known = set(classifier.intents)
+        replies = {}
+        for intent, actions in context_free_actions(rules, stories).items():
+            # Actions other than plain responses (custom actions, forms) need Rasa
+            if intent in known and all(responses.get(action) for action in actions):
+                replies[intent] = [responses[action] for action in actions]
+        return cls(classifier, replies, **kwargs)
+
+    def answer(self, message: str, rasa_available: bool = True) -> Optional[Tuple[str, List[dict]]]:
+        """(intent, bot messages) if the message can be answered without
+        Rasa, else None. With rasa_available=False a lower confidence is
+        accepted, since the alternative is the keyword fallback."""
+        if not self.enabled:
+            return None
+        intent, confidence, lead = self._classify(message)
+        threshold = self.threshold if rasa_available else self.fallback_threshold
+        if intent not in self.replies or confidence < threshold or lead < self.margin:
+            if rasa_available:
+                self.deferred += 1
+            return None
+        if rasa_available:
+            self.answered += 1
+        messages = []
+        for templates in self.replies[intent]:
+            template = random.choice(templates)
+            messages.append({key: template[key] for key in ("text", "image", "buttons")
+                             if template.get(key)})
+        return intent, messages
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "intents": sorted(self.replies),
+            "answered": self.answered,
+            "deferred": self.deferred,
+        }
+
+
+nlu_fast_path = NLUFastPath.from_files()
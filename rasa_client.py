@@ -0,0 +1,134 @@
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+# Rasa server configuration
+RASA_API_URL = os.getenv("RASA_API_URL", "http://localhost:5005")
+RASA_CONNECT_TIMEOUT = float(os.getenv("RASA_CONNECT_TIMEOUT", "2"))
+RASA_READ_TIMEOUT = float(os.getenv("RASA_READ_TIMEOUT", "10"))
+RASA_MAX_CONNECTIONS = int(os.getenv("RASA_MAX_CONNECTIONS", "100"))
+RASA_MAX_KEEPALIVE = int(os.getenv("RASA_MAX_KEEPALIVE", "20"))
+RASA_MAX_CONCURRENCY = int(os.getenv("RASA_MAX_CONCURRENCY", "64"))
+
+
+class RasaClient:
+    """Async client for the Rasa REST webhook with a shared keep-alive pool"""
+
+    def __init__(self, base_url: str = RASA_API_URL,
+                 connect_timeout: float = RASA_CONNECT_TIMEOUT,
+                 read_timeout: float = RASA_READ_TIMEOUT,
+                 max_connections: int = RASA_MAX_CONNECTIONS,
+                 max_keepalive: int = RASA_MAX_KEEPALIVE,
+                 max_concurrency: int = RASA_MAX_CONCURRENCY,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(
+            read_timeout, connect=connect_timeout, pool=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive)
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker or CircuitBreaker()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Pooled connections are bound to the event loop that opened them, so
+        # a client created on another loop (e.g. a TestClient used without its
+        # lifespan) is replaced rather than reused.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    async def start(self):
+        """Open the connection pool on the running event loop"""
+        self._get_client()
+
+    async def close(self):
+        """Close the connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+
+    @staticmethod
+    def _payload(message: str, sender_id: str, metadata: Optional[dict]) -> dict:
+        payload = {"sender": sender_id, "message": message}
+        if metadata:
+            payload["metadata"] = metadata
+        return payload
+
+    async def send_message(self, message: str, sender_id: str,
+                           metadata: Optional[dict] = None) -> List[Dict[str, Any]]:
+        """Send a user message to Rasa and return the bot messages.
+
+        `metadata` is passed through to the custom actions
+        (tracker.latest_message["metadata"]).
+
+        Raises httpx.HTTPError on connection errors, timeouts and non-200
+        responses, and CircuitOpenError without contacting Rasa while recent
+        calls have been failing.
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Rasa circuit is open")
+
+        client = self._get_client()
+        try:
+            async with self._semaphore:
+                response = await client.post(
+                    "/webhooks/rest/webhook",
+                    json=self._payload(message, sender_id, metadata))
+            response.raise_for_status()
+            messages = response.json() or []
+        except (httpx.HTTPError, ValueError):
+            self.breaker.record_failure()
+            raise
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+
+        self.breaker.record_success()
+        return messages
+
+    async def stream_messages(self, message: str, sender_id: str,
+                              metadata: Optional[dict] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield each bot message as soon as Rasa emits it.
+
+        Uses the REST channel's `stream=true` mode, which writes one JSON
+        message per line. Errors are raised as in send_message.
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Rasa circuit is open")
+
+        client = self._get_client()
+        try:
+            async with self._semaphore:
+                async with client.stream(
+                        "POST", "/webhooks/rest/webhook", params={"stream": "true"},
+                        json=self._payload(message, sender_id, metadata)) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if line.strip():
+                            yield json.loads(line)
+        except (httpx.HTTPError, ValueError):
+            self.breaker.record_failure()
+            raise
+        except (asyncio.CancelledError, GeneratorExit):
+            self.breaker.release()
+            raise
+
+        self.breaker.record_success()
+
+
+rasa_client = RasaClient()
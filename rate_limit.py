@@ -0,0 +1,253 @@
+"""
+Per-client rate limiting and admission control for the chat endpoints.
+
+RateLimiter keeps a token bucket per sender_id and per client IP; a request
+must find a token in both. With several workers the buckets live in the
+shared state backend, so the limits hold across workers. AdmissionController caps the number of chat
+requests being processed at once and lets a bounded number wait for a slot;
+beyond that, or after waiting too long, requests are shed with a 503 so
+latency stays flat for the traffic that is admitted.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from starlette.responses import JSONResponse
+
+from shared_state import shared_state
+
+# Rate limits (tokens per second and bucket size)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_SENDER_RATE = float(os.getenv("RATE_LIMIT_SENDER_RATE", "1"))
+RATE_LIMIT_SENDER_BURST = float(os.getenv("RATE_LIMIT_SENDER_BURST", "10"))
+RATE_LIMIT_IP_RATE = float(os.getenv("RATE_LIMIT_IP_RATE", "20"))
+RATE_LIMIT_IP_BURST = float(os.getenv("RATE_LIMIT_IP_BURST", "100"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+# Admission control
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "128"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "256"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+
+
+class TokenBucketLimiter:
+    """Token buckets keyed by an arbitrary string.
+
+    A bucket that has not been touched for `burst / rate` seconds is full
+    again, which is the same as having no bucket, so such buckets are
+    dropped. At most `max_keys` buckets are kept; beyond that the least
+    recently used is dropped early. Not thread-safe; use it from the event
+    loop.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = RATE_LIMIT_MAX_KEYS,
+                 clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.clock = clock
+        self.idle_ttl = burst / rate
+        # key -> [tokens, last update], least recently used first
+        self._buckets = OrderedDict()
+        self.evicted = 0
+
+    def tokens(self, key: str) -> float:
+        """Tokens available to key now"""
+        now = self.clock()
+        self._evict_idle(now)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return self.burst
+        return min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+
+    def retry_after(self, key: str, cost: float = 1.0) -> float:
+        """Seconds until key has `cost` tokens; 0 if it has them now"""
+        return max(0.0, (cost - self.tokens(key)) / self.rate)
+
+    def take(self, key: str, cost: float = 1.0):
+        """Spend tokens; call after retry_after returned 0"""
+        tokens = self.tokens(key)
+        self._buckets[key] = [tokens - cost, self.clock()]
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+            self.evicted += 1
+
+    def _evict_idle(self, now: float):
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if now - bucket[1] < self.idle_ttl:
+                return
+            del self._buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RateLimiter:
+    """Per-sender and per-IP token buckets; a request needs a token in both.
+
+    Buckets are kept in this process unless a shared state backend is
+    given, in which case every worker spends from the same buckets.
+    """
+
+    def __init__(self, enabled: bool = RATE_LIMIT_ENABLED,
+                 sender_rate: float = RATE_LIMIT_SENDER_RATE,
+                 sender_burst: float = RATE_LIMIT_SENDER_BURST,
+                 ip_rate: float = RATE_LIMIT_IP_RATE,
+                 ip_burst: float = RATE_LIMIT_IP_BURST,
+                 max_keys: int = RATE_LIMIT_MAX_KEYS,
+                 clock=time.monotonic, state=None):
+        self.enabled = enabled
+        self.senders = TokenBucketLimiter(sender_rate, sender_burst, max_keys, clock)
+        self.ips = TokenBucketLimiter(ip_rate, ip_burst, max_keys, clock)
+        self.state = state
+        self.allowed = 0
+        self.limited = 0
+
+    def check(self, sender_id: Optional[str], ip: Optional[str]) -> float:
+        """Take a token for the request, or return seconds to wait before retrying"""
+        if not self.enabled:
+            return 0.0
+        if self.state is not None:
+            wait = self._check_shared(sender_id, ip)
+        else:
+            wait = self._check_local(sender_id, ip)
+        if wait:
+            self.limited += 1
+            return wait
+        self.allowed += 1
+        return 0.0
+
+    async def check_async(self, sender_id: Optional[str], ip: Optional[str]) -> float:
+        """check() for request handlers: a shared backend is called from a
+        worker thread, since it may wait on other workers' writes"""
+        if self.enabled and self.state is not None:
+            return await asyncio.to_thread(self.check, sender_id, ip)
+        return self.check(sender_id, ip)
+
+    def _check_shared(self, sender_id: Optional[str], ip: Optional[str]) -> float:
+        buckets = [(f"{kind}:{key}", limiter.rate, limiter.burst)
+                   for kind, limiter, key in (("sender", self.senders, sender_id),
+                                              ("ip", self.ips, ip))
+                   if key is not None]
+        return self.state.take_tokens(buckets)
+
+    def _check_local(self, sender_id: Optional[str], ip: Optional[str]) -> float:
+        keys = [(limiter, key) for limiter, key in ((self.senders, sender_id), (self.ips, ip))
+                if key is not None]
+        wait = max((limiter.retry_after(key) for limiter, key in keys), default=0.0)
+        if wait:
+            return wait
+        for limiter, key in keys:
+            limiter.take(key)
+        return 0.0
+
+    def stats(self) -> dict:
+        """Tracked clients and how many requests were limited"""
+        return {
+            "enabled": self.enabled,
+            "shared": self.state is not None,
+            "senders": len(self.senders),
+            "ips": len(self.ips),
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "evicted": self.senders.evicted + self.ips.evicted,
+        }
+
+
+class AdmissionController:
+    """Caps concurrent requests, with a bounded, time-limited wait for a slot"""
+
+    def __init__(self, max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+                 max_queue: int = ADMISSION_MAX_QUEUE,
+                 queue_timeout: float = ADMISSION_QUEUE_TIMEOUT):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # A semaphore is bound to the event loop it is first used on
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._loop = loop
+        return self._semaphore
+
+    async def acquire(self) -> bool:
+        """Wait for a slot; False if the request should be shed instead"""
+        semaphore = self._get_semaphore()
+        if semaphore.locked():
+            if self.queued >= self.max_queue:
+                self.shed += 1
+                return False
+            self.queued += 1
+            try:
+                await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.shed += 1
+                return False
+            finally:
+                self.queued -= 1
+        else:
+            await semaphore.acquire()
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self) -> dict:
+        """Current load and how many requests were shed"""
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware running requests to `paths` through an AdmissionController.
+
+    The slot is held until the response has been sent, including streamed
+    responses.
+    """
+
+    def __init__(self, app, controller: AdmissionController, paths):
+        self.app = app
+        self.controller = controller
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.controller.acquire():
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry shortly"},
+                status_code=503, headers={"Retry-After": "1"})
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+
+rate_limiter = RateLimiter(state=shared_state if shared_state.shared else None)
+admission_controller = AdmissionController()
@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fallback import normalize_text
+
+# Response cache configuration (opt-in)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "5000"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "600"))
+# Comma-separated intents; an empty allow list allows every intent not denied
+RESPONSE_CACHE_ALLOW_INTENTS = os.getenv("RESPONSE_CACHE_ALLOW_INTENTS", "")
+RESPONSE_CACHE_DENY_INTENTS = os.getenv("RESPONSE_CACHE_DENY_INTENTS", "")
+
+
+def _split(value: str) -> frozenset:
+    return frozenset(item.strip() for item in value.split(",") if item.strip())
+
+
+def cache_key(message: str, language: str) -> Tuple[str, str]:
+    """Normalize a message so trivially different spellings share an entry"""
+    text = "".join(c for c in normalize_text(message)
+                   if not unicodedata.category(c).startswith("P"))
+    return " ".join(text.split()), language
+
+
+class ResponseCache:
+    """LRU cache of replies to stateless questions, shared across senders.
+
+    Only messages classified into an allowed intent are cached; anything
+    unclassified (answers to follow-up questions, small talk, ...) always goes
+    to Rasa. A cached reply skips Rasa entirely, so the sender's Rasa tracker
+    does not see that turn.
+    """
+
+    def __init__(self, enabled: bool = RESPONSE_CACHE_ENABLED,
+                 max_size: int = RESPONSE_CACHE_SIZE,
+                 ttl: float = RESPONSE_CACHE_TTL,
+                 allow_intents=_split(RESPONSE_CACHE_ALLOW_INTENTS),
+                 deny_intents=_split(RESPONSE_CACHE_DENY_INTENTS)):
+        self.enabled = enabled
+        self.max_size = max_size
+        self.ttl = ttl
+        self.allow_intents = frozenset(allow_intents)
+        self.deny_intents = frozenset(deny_intents)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def cacheable(self, intent: Optional[str]) -> bool:
+        if not self.enabled or intent is None or intent in self.deny_intents:
+            return False
+        return not self.allow_intents or intent in self.allow_intents
+
+    def get(self, message: str, language: str) -> Optional[Tuple[str, str, list]]:
+        """Return the cached (response, intent, messages) for a message, if fresh"""
+        key = cache_key(message, language)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2], entry[3]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+        return None
+
+    def put(self, message: str, language: str, response: str, intent: str, messages: list = None):
+        key = cache_key(message, language)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, response, intent, messages or [])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+response_cache = ResponseCache()
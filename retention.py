@@ -0,0 +1,128 @@
+"""
+Retention and archival for the user_interactions log.
+
+Interactions older than the retention period are moved out of the hot table
+into one gzip-compressed JSON Lines file per calendar month
+(archive/user_interactions-2025-09.jsonl.gz, ...), then deleted. The
+interaction_stats summary keeps counting them, and `python analytics.py
+rebuild` reads the archive alongside the hot table.
+
+Run it from cron or a scheduler, e.g. nightly:
+    python retention.py archive --days 90 --vacuum
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Iterator, Tuple
+
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, UserInteraction, init_db
+
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "90"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(os.path.dirname(__file__), "archive"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "10000"))
+
+COLUMNS = ("id", "sender_id", "message", "response", "intent", "language", "timestamp")
+
+
+def archive_path(archive_dir: str, timestamp: datetime) -> str:
+    return os.path.join(archive_dir, f"user_interactions-{timestamp:%Y-%m}.jsonl.gz")
+
+
+def archive_before(db: Session, cutoff: datetime, archive_dir: str = ARCHIVE_DIR,
+                   batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Move interactions older than cutoff to monthly archive files.
+
+    Works in batches of `batch_size` rows; each batch is appended to the
+    archive (as a new gzip member) before it is deleted and committed, so an
+    interrupted run loses nothing, though it may archive a batch twice.
+    Archived records keep their id and timestamp for de-duplication.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    table = UserInteraction.__table__
+    archived = 0
+
+    while True:
+        rows = db.execute(
+            table.select()
+            .where(table.c.timestamp < cutoff)
+            .order_by(table.c.timestamp, table.c.id)
+            .limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            return archived
+
+        by_file = {}
+        for row in rows:
+            record = {column: row[column] for column in COLUMNS}
+            record["timestamp"] = row["timestamp"].isoformat()
+            by_file.setdefault(archive_path(archive_dir, row["timestamp"]), []).append(record)
+
+        for path, records in by_file.items():
+            with gzip.open(path, "at", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        db.execute(table.delete().where(table.c.id.in_([row["id"] for row in rows])))
+        db.commit()
+        archived += len(rows)
+
+
+def iter_archive(archive_dir: str = ARCHIVE_DIR) -> Iterator[dict]:
+    """Yield archived interactions oldest month first, skipping duplicates.
+
+    A batch archived twice lands in the same monthly file, so duplicates are
+    only looked for within a file. They are recognised by id and timestamp,
+    since databases created before ids were made AUTOINCREMENT reuse the
+    ids of archived rows.
+    """
+    for path in sorted(glob.glob(os.path.join(archive_dir, "user_interactions-*.jsonl.gz"))):
+        seen = set()
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                key = (record["id"], record["timestamp"])
+                if key in seen:
+                    continue
+                seen.add(key)
+                record["timestamp"] = datetime.fromisoformat(record["timestamp"])
+                yield record
+
+
+def iter_archive_stats_rows(archive_dir: str = ARCHIVE_DIR) -> Iterator[Tuple[str, str, datetime]]:
+    """(language, intent, timestamp) tuples for analytics.rebuild"""
+    for record in iter_archive(archive_dir):
+        yield record["language"], record["intent"], record["timestamp"]
+
+
+def vacuum(db: Session):
+    """Give the space freed by archival back to the filesystem (SQLite)"""
+    if db.get_bind().dialect.name == "sqlite":
+        db.commit()
+        with db.get_bind().connect() as connection:
+            connection.execution_options(isolation_level="AUTOCOMMIT").exec_driver_sql("VACUUM")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old interactions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    archive_parser = subparsers.add_parser("archive", help="archive and delete old rows")
+    archive_parser.add_argument("--days", type=int, default=RETENTION_DAYS,
+                                help="keep this many days in the hot table")
+    archive_parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    archive_parser.add_argument("--vacuum", action="store_true",
+                                help="reclaim disk space afterwards (SQLite)")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    cutoff = datetime.utcnow() - timedelta(days=args.days)
+    count = archive_before(db, cutoff, args.archive_dir)
+    if args.vacuum:
+        vacuum(db)
+    db.close()
+    print(f"Archived {count} interactions older than {cutoff:%Y-%m-%d} to {args.archive_dir}")
@@ -0,0 +1,332 @@
+"""
+Per-sender conversation state kept by the API.
+
+A Session holds the last SESSION_MAX_TURNS turns of a conversation, the
+language it is in and a few slots (the health topic being discussed as
+`symptom`, and the `age` mentioned), so the fallback can answer follow-up
+questions while Rasa is unavailable.
+
+SessionStore keeps recently active sessions in memory, least recently used
+first. A session idle for SESSION_IDLE_TTL seconds is dropped from memory,
+and the least recently used are dropped early once the estimated size of
+all sessions passes SESSION_MAX_MEMORY_MB, so memory use stays flat however
+many senders there are. Changed sessions are written to the
+conversation_sessions table in batches every SESSION_FLUSH_INTERVAL
+seconds, and a sender that comes back after being dropped is loaded from
+there. As with Rasa's session_config in domain.yml, the turns of a
+conversation idle for SESSION_EXPIRY seconds are forgotten and its slots
+and language are carried over.
+
+With a shared state backend (several workers) sessions are kept there
+instead of in this process's memory, so every worker sees the same
+conversation.
+"""
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam
+
+from database import ConversationSession, SessionLocal
+from shared_state import shared_state
+
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "5"))
+# Longer messages and replies are kept truncated
+SESSION_MAX_TEXT = int(os.getenv("SESSION_MAX_TEXT", "200"))
+SESSION_MAX_MEMORY_MB = float(os.getenv("SESSION_MAX_MEMORY_MB", "64"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "3600"))
+SESSION_EXPIRY = float(os.getenv("SESSION_EXPIRY", "3600"))
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "2.0"))
+SESSION_BATCH_SIZE = int(os.getenv("SESSION_BATCH_SIZE", "500"))
+# Stored sessions untouched for this many days are deleted
+SESSION_RETENTION_DAYS = float(os.getenv("SESSION_RETENTION_DAYS", "30"))
+
+# Approximate bytes of a session besides its strings: the object, its
+# turn list and slot dict, and its entry in the LRU (see bench_sessions)
+SESSION_OVERHEAD = 520
+
+# "5 years", "2 yrs", "3 saal", "५ वर्ष", "୪ ବର୍ଷ"
+_AGE = re.compile(r"(\d{1,3})\s*(?:years?|yrs?|yr|saal|sal|barsa|varsh|वर्ष|साल|ବର୍ଷ)",
+                  re.IGNORECASE)
+
+# Built once; a lookup runs for every sender not in memory
+_SELECT_SESSION = ConversationSession.__table__.select().where(
+    ConversationSession.__table__.c.sender_id == bindparam("sender_id"))
+
+
+def extract_age(message: str) -> Optional[int]:
+    """Age in years mentioned in a message, if any"""
+    match = _AGE.search(message)
+    if match is None:
+        return None
+    age = int(match.group(1))
+    return age if age <= 120 else None
+
+
+class Session:
+    """One sender's recent conversation"""
+
+    __slots__ = ("sender_id", "language", "slots", "turns", "updated", "size")
+
+    def __init__(self, sender_id: str, language: Optional[str] = None,
+                 slots: Optional[dict] = None, turns: Optional[List[list]] = None,
+                 updated: float = 0.0):
+        self.sender_id = sender_id
+        self.language = language
+        self.slots = slots or {}
+        self.turns = turns or []
+        self.updated = updated
+        self.size = self._size()
+
+    def _size(self) -> int:
+        return (SESSION_OVERHEAD + sys.getsizeof(self.sender_id)
+                + sum(sys.getsizeof(text) for turn in self.turns for text in turn)
+                + 100 * len(self.slots))
+
+    def add_turn(self, message: str, reply: str, max_turns: int, max_text: int):
+        self.turns.append([message[:max_text], reply[:max_text]])
+        del self.turns[:-max_turns]
+        self.size = self._size()
+
+    def to_dict(self) -> dict:
+        return {"language": self.language, "slots": self.slots, "turns": self.turns,
+                "updated": self.updated}
+
+    @classmethod
+    def from_dict(cls, sender_id: str, data: dict) -> "Session":
+        return cls(sender_id, data.get("language"), data.get("slots"), data.get("turns"),
+                   data.get("updated", 0.0))
+
+
+class SessionStore:
+    """Bounded in-memory sessions, persisted to the database in batches"""
+
+    def __init__(self, session_factory=SessionLocal, state=shared_state,
+                 max_turns: int = SESSION_MAX_TURNS,
+                 max_text: int = SESSION_MAX_TEXT,
+                 max_bytes: int = int(SESSION_MAX_MEMORY_MB * 1024 * 1024),
+                 idle_ttl: float = SESSION_IDLE_TTL,
+                 expiry: float = SESSION_EXPIRY,
+                 flush_interval: float = SESSION_FLUSH_INTERVAL,
+                 batch_size: int = SESSION_BATCH_SIZE,
+                 retention_days: float = SESSION_RETENTION_DAYS,
+                 clock=time.time):
+        self.session_factory = session_factory
+        self.state = state
+        self.max_turns = max_turns
+        self.max_text = max_text
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.expiry = expiry
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.retention_days = retention_days
+        self.clock = clock
+        # sender_id -> Session, least recently used first
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._bytes = 0
+        # Changed since the last flush; kept here even if dropped from memory
+        self._dirty: Dict[str, Session] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._next_purge = 0.0
+        self.hits = 0
+        self.loads = 0
+        self.evicted = 0
+        self.written = 0
+        self.failed = 0
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the writer and store every changed session"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._dirty:
+            if not await asyncio.to_thread(self.flush):
+                break
+
+    # Lookup
+
+    async def get(self, sender_id: str) -> Session:
+        """The sender's session: from memory, the shared state or the
+        database, or a new one"""
+        if self.state.shared:
+            data = await asyncio.to_thread(self.state.get, f"session:{sender_id}")
+            session = None if data is None else Session.from_dict(sender_id, data)
+        else:
+            session = self._cached(sender_id)
+        if session is None:
+            session = await asyncio.to_thread(self._load, sender_id)
+            self.loads += 1
+        else:
+            self.hits += 1
+        if session.turns and self.clock() - session.updated > self.expiry:
+            # A new conversation; slots and language carry over. The size
+            # is brought up to date by record()
+            session.turns = []
+        return session
+
+    def _cached(self, sender_id: str) -> Optional[Session]:
+        with self._lock:
+            session = self._sessions.get(sender_id) or self._dirty.get(sender_id)
+            if session is not None and sender_id in self._sessions:
+                self._sessions.move_to_end(sender_id)
+            return session
+
+    def _load(self, sender_id: str) -> Session:
+        db = self.session_factory()
+        try:
+            row = db.execute(_SELECT_SESSION, {"sender_id": sender_id}).first()
+        except Exception as e:
+            print(f"Error loading session: {e}")
+            row = None
+        finally:
+            db.close()
+        if row is None:
+            return Session(sender_id)
+        updated = row.updated_at or datetime(1970, 1, 1)
+        return Session(sender_id, row.language, json.loads(row.slots or "{}"),
+                       json.loads(row.turns or "[]"),
+                       (updated - datetime(1970, 1, 1)).total_seconds())
+
+    # Updates
+
+    async def record(self, session: Session, message: str, reply: str, language: str,
+                     slots: Optional[dict] = None):
+        """Add a turn to the session and keep it"""
+        if self.state.shared:
+            self._update(session, message, reply, language, slots)
+            await asyncio.to_thread(self.state.set, f"session:{session.sender_id}",
+                                    session.to_dict(), self.idle_ttl)
+            with self._lock:
+                self._dirty[session.sender_id] = session
+            return
+
+        with self._lock:
+            previous = self._sessions.pop(session.sender_id, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._update(session, message, reply, language, slots)
+            self._sessions[session.sender_id] = session
+            self._bytes += session.size
+            self._dirty[session.sender_id] = session
+            self._evict(session.updated)
+
+    def _update(self, session: Session, message: str, reply: str, language: str,
+                slots: Optional[dict]):
+        session.language = language
+        if slots:
+            session.slots.update(slots)
+        session.add_turn(message, reply, self.max_turns, self.max_text)
+        session.updated = self.clock()
+
+    def _evict(self, now: float):
+        sessions = self._sessions
+        while sessions:
+            sender_id, oldest = next(iter(sessions.items()))
+            if now - oldest.updated < self.idle_ttl and self._bytes <= self.max_bytes:
+                return
+            del sessions[sender_id]
+            self._bytes -= oldest.size
+            self.evicted += 1
+
+    # Persistence
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            while len(self._dirty) and await asyncio.to_thread(self.flush) == self.batch_size:
+                pass
+
+    def flush(self) -> int:
+        """Write up to batch_size changed sessions; returns how many were written"""
+        with self._lock:
+            batch = []
+            for sender_id in list(self._dirty)[:self.batch_size]:
+                batch.append(self._dirty.pop(sender_id))
+            rows = [{
+                "sender_id": session.sender_id,
+                "language": session.language,
+                "slots": json.dumps(session.slots, ensure_ascii=False),
+                "turns": json.dumps(session.turns, ensure_ascii=False),
+                "updated_at": datetime.utcfromtimestamp(session.updated),
+            } for session in batch]
+        if not rows:
+            return 0
+
+        db = self.session_factory()
+        try:
+            self._upsert(db, rows)
+            now = self.clock()
+            if now >= self._next_purge:
+                self._next_purge = now + 3600
+                cutoff = datetime.utcfromtimestamp(now) - timedelta(days=self.retention_days)
+                db.query(ConversationSession).filter(
+                    ConversationSession.updated_at < cutoff).delete(synchronize_session=False)
+            db.commit()
+            self.written += len(rows)
+        except Exception as e:
+            db.rollback()
+            self.failed += len(rows)
+            print(f"Error writing sessions: {e}")
+        finally:
+            db.close()
+        return len(rows)
+
+    @staticmethod
+    def _upsert(db, rows: List[dict]):
+        table = ConversationSession.__table__
+        dialect = db.get_bind().dialect.name
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            insert = None
+
+        if insert is not None:
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.sender_id],
+                set_={column: stmt.excluded[column]
+                      for column in ("language", "slots", "turns", "updated_at")})
+            db.execute(stmt, rows)
+            return
+
+        for row in rows:
+            result = db.execute(table.update().where(table.c.sender_id == row["sender_id"])
+                                .values(**row))
+            if result.rowcount == 0:
+                db.execute(table.insert(), row)
+
+    def stats(self) -> dict:
+        """Sessions in memory, their estimated size and write counters"""
+        return {
+            "in_memory": len(self._sessions),
+            "memory_bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "pending_writes": len(self._dirty),
+            "hits": self.hits,
+            "loads": self.loads,
+            "evicted": self.evicted,
+            "written": self.written,
+            "failed": self.failed,
+        }
+
+
+session_store = SessionStore()
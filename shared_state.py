@@ -0,0 +1,422 @@
+"""
+State shared by all worker processes serving the API.
+
+With one process everything can live in memory. With several (uvicorn
+--workers N, or gunicorn with gunicorn.conf.py) each worker has its own
+globals, so state the workers must agree on, such as rate limits and live
+statistics, has to be kept somewhere all workers see. SHARED_STATE_BACKEND
+selects where:
+
+    memory   this process only (the default; for a single worker)
+    sqlite   a local SQLite file at SHARED_STATE_PATH, for workers on one machine
+    redis    a Redis-compatible server at SHARED_STATE_URL (needs the
+             `redis` package), for workers on one or more machines
+
+Every backend offers the same operations:
+
+    take_tokens  atomically spend a token from several token buckets
+    incr_many / counts   shared counters, grouped by name
+    get / set / delete   JSON values with an optional time to live
+    lock         a named lock held across processes
+
+Values are passed through JSON, so only store plain data. The sqlite and
+redis backends block on I/O, so call them from a worker thread (e.g.
+asyncio.to_thread) when on the event loop.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+SHARED_STATE_BACKEND = os.getenv("SHARED_STATE_BACKEND", "memory").lower()
+SHARED_STATE_PATH = os.getenv(
+    "SHARED_STATE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "shared_state.db"))
+SHARED_STATE_URL = os.getenv("SHARED_STATE_URL", "redis://localhost:6379/0")
+SHARED_STATE_PREFIX = os.getenv("SHARED_STATE_PREFIX", "ama:")
+SHARED_STATE_MAX_KEYS = int(os.getenv("SHARED_STATE_MAX_KEYS", "100000"))
+# Workers the server was told to start (uvicorn and gunicorn both read this)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# (key, rate in tokens per second, burst)
+Bucket = Tuple[str, float, float]
+
+
+def _refill(tokens: float, updated: float, now: float, rate: float, burst: float) -> float:
+    return min(burst, tokens + max(0.0, now - updated) * rate)
+
+
+class MemoryState:
+    """Shared state for a single process"""
+
+    shared = False
+    name = "memory"
+
+    def __init__(self, max_keys: int = SHARED_STATE_MAX_KEYS, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        # key -> [tokens, last update], least recently used first
+        self._buckets = OrderedDict()
+        self._counters: Dict[str, Counter] = {}
+        # key -> (value, expiry or None)
+        self._values = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def take_tokens(self, buckets: Iterable[Bucket], cost: float = 1.0) -> float:
+        """Take `cost` tokens from every bucket, or none if any is short; returns
+        seconds until all of them would have the tokens (0 if taken)"""
+        buckets = list(buckets)
+        with self._lock:
+            now = self.clock()
+            levels = []
+            for key, rate, burst in buckets:
+                bucket = self._buckets.get(key)
+                tokens = burst if bucket is None else _refill(*bucket, now, rate, burst)
+                levels.append(tokens)
+            wait = max(((cost - tokens) / rate for tokens, (_, rate, _) in zip(levels, buckets)),
+                       default=0.0)
+            if wait > 0:
+                return wait
+            for tokens, (key, _, _) in zip(levels, buckets):
+                self._buckets[key] = [tokens - cost, now]
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return 0.0
+
+    def incr_many(self, name: str, counts: Dict[str, int]):
+        with self._lock:
+            self._counters.setdefault(name, Counter()).update(counts)
+
+    def counts(self, name: str) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters.get(name, {}))
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._values.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires <= self.clock():
+                del self._values[key]
+                return None
+            return json.loads(value)
+
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        with self._lock:
+            expires = self.clock() + ttl if ttl else None
+            self._values[key] = (json.dumps(value), expires)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._values.pop(key, None)
+
+    @contextmanager
+    def lock(self, name: str, timeout: float = 30.0):
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        if not lock.acquire(timeout=timeout):
+            raise TimeoutError(f"could not acquire lock {name!r}")
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": self.name, "buckets": len(self._buckets),
+                    "values": len(self._values)}
+
+    def close(self):
+        pass
+
+
+class SQLiteState:
+    """Shared state in a SQLite file, for worker processes on one machine.
+
+    Each operation is one short transaction; token buckets are updated
+    under BEGIN IMMEDIATE so two workers cannot spend the same token.
+    Buckets idle long enough to be full again, and expired values, are
+    deleted by any write at most every `cleanup_interval` seconds.
+    """
+
+    shared = True
+    name = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS buckets (
+            key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL,
+            full_at REAL NOT NULL);
+        CREATE INDEX IF NOT EXISTS ix_buckets_full_at ON buckets (full_at);
+        CREATE TABLE IF NOT EXISTS counters (
+            name TEXT NOT NULL, field TEXT NOT NULL, value INTEGER NOT NULL,
+            PRIMARY KEY (name, field));
+        CREATE TABLE IF NOT EXISTS kv (
+            key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL);
+        CREATE TABLE IF NOT EXISTS locks (
+            name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL);
+    """
+
+    def __init__(self, path: str = SHARED_STATE_PATH, busy_timeout: float = 5.0,
+                 cleanup_interval: float = 60.0, clock=time.time):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.cleanup_interval = cleanup_interval
+        # Wall-clock time, which every process agrees on
+        self.clock = clock
+        self._local = threading.local()
+        self._next_cleanup = 0.0
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=self.busy_timeout,
+                                 isolation_level=None, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        """A write transaction; other writers wait for it (up to busy_timeout)"""
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def take_tokens(self, buckets: Iterable[Bucket], cost: float = 1.0) -> float:
+        buckets = list(buckets)
+        now = self.clock()
+        with self._transaction() as db:
+            levels = []
+            for key, rate, burst in buckets:
+                row = db.execute("SELECT tokens, updated FROM buckets WHERE key = ?",
+                                 (key,)).fetchone()
+                levels.append(burst if row is None else _refill(*row, now, rate, burst))
+            wait = max(((cost - tokens) / rate for tokens, (_, rate, _) in zip(levels, buckets)),
+                       default=0.0)
+            if wait > 0:
+                return wait
+            db.executemany(
+                "INSERT OR REPLACE INTO buckets (key, tokens, updated, full_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(key, tokens - cost, now, now + (burst - tokens + cost) / rate)
+                 for tokens, (key, rate, burst) in zip(levels, buckets)])
+            self._cleanup(db, now)
+        return 0.0
+
+    def _cleanup(self, db: sqlite3.Connection, now: float):
+        """Delete full buckets and expired values, at most every cleanup_interval"""
+        if now < self._next_cleanup:
+            return
+        self._next_cleanup = now + self.cleanup_interval
+        db.execute("DELETE FROM buckets WHERE full_at <= ?", (now,))
+        db.execute("DELETE FROM kv WHERE expires <= ?", (now,))
+
+    def incr_many(self, name: str, counts: Dict[str, int]):
+        if not counts:
+            return
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT INTO counters (name, field, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (name, field) DO UPDATE SET value = value + excluded.value",
+                [(name, field, value) for field, value in counts.items()])
+            self._cleanup(db, self.clock())
+
+    def counts(self, name: str) -> Dict[str, int]:
+        rows = self._connection().execute(
+            "SELECT field, value FROM counters WHERE name = ?", (name,)).fetchall()
+        return dict(rows)
+
+    def get(self, key: str):
+        row = self._connection().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (key, self.clock())).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        now = self.clock()
+        expires = now + ttl if ttl else None
+        with self._transaction() as db:
+            db.execute("INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)",
+                       (key, json.dumps(value), expires))
+            self._cleanup(db, now)
+
+    def delete(self, key: str):
+        with self._transaction() as db:
+            db.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    @contextmanager
+    def lock(self, name: str, timeout: float = 30.0, lease: float = 300.0):
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        while True:
+            now = self.clock()
+            with self._transaction() as db:
+                # A holder that died keeps the lock only until its lease runs out
+                db.execute("DELETE FROM locks WHERE name = ? AND expires <= ?", (name, now))
+                acquired = db.execute(
+                    "INSERT OR IGNORE INTO locks (name, owner, expires) VALUES (?, ?, ?)",
+                    (name, owner, now + lease)).rowcount == 1
+            if acquired:
+                break
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"could not acquire lock {name!r}")
+            time.sleep(0.05)
+        try:
+            yield
+        finally:
+            with self._transaction() as db:
+                db.execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner))
+
+    def stats(self) -> dict:
+        db = self._connection()
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "buckets": db.execute("SELECT COUNT(*) FROM buckets").fetchone()[0],
+            "values": db.execute("SELECT COUNT(*) FROM kv").fetchone()[0],
+        }
+
+    def close(self):
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+
+# KEYS: bucket keys; ARGV: now, cost, then rate and burst for each key.
+# Buckets are hashes {tokens, updated} that expire once they would be full.
+_TAKE_TOKENS = """
+local now = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[1 + 2 * i])
+    local burst = tonumber(ARGV[2 + 2 * i])
+    local bucket = redis.call('HMGET', key, 'tokens', 'updated')
+    local tokens = burst
+    if bucket[1] then
+        tokens = math.min(burst, tonumber(bucket[1]) + math.max(0, now - tonumber(bucket[2])) * rate)
+    end
+    levels[i] = tokens
+    wait = math.max(wait, (cost - tokens) / rate)
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[1 + 2 * i])
+    local burst = tonumber(ARGV[2 + 2 * i])
+    redis.call('HSET', key, 'tokens', levels[i] - cost, 'updated', now)
+    redis.call('PEXPIRE', key, math.ceil((burst - levels[i] + cost) / rate * 1000))
+end
+return '0'
+"""
+
+
+class RedisState:
+    """Shared state on a Redis-compatible server, for workers on any machine.
+
+    Token buckets are updated by a Lua script, so a check-and-take is one
+    atomic round trip. All keys carry SHARED_STATE_PREFIX, and buckets and
+    values with a time to live expire on the server.
+    """
+
+    shared = True
+    name = "redis"
+
+    def __init__(self, url: str = SHARED_STATE_URL, prefix: str = SHARED_STATE_PREFIX):
+        if redis is None:
+            raise RuntimeError("SHARED_STATE_BACKEND=redis needs the redis package "
+                               "(pip install redis)")
+        self.url = url
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+        self._take_tokens = self.client.register_script(_TAKE_TOKENS)
+
+    def take_tokens(self, buckets: Iterable[Bucket], cost: float = 1.0) -> float:
+        buckets = list(buckets)
+        if not buckets:
+            return 0.0
+        args = [time.time(), cost]
+        for _, rate, burst in buckets:
+            args.extend((rate, burst))
+        keys = [f"{self.prefix}bucket:{key}" for key, _, _ in buckets]
+        return float(self._take_tokens(keys=keys, args=args))
+
+    def incr_many(self, name: str, counts: Dict[str, int]):
+        if not counts:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for field, value in counts.items():
+            pipe.hincrby(f"{self.prefix}counters:{name}", field, value)
+        pipe.execute()
+
+    def counts(self, name: str) -> Dict[str, int]:
+        raw = self.client.hgetall(f"{self.prefix}counters:{name}")
+        return {field.decode("utf-8"): int(value) for field, value in raw.items()}
+
+    def get(self, key: str):
+        value = self.client.get(f"{self.prefix}kv:{key}")
+        return None if value is None else json.loads(value)
+
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        self.client.set(f"{self.prefix}kv:{key}", json.dumps(value),
+                        px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key: str):
+        self.client.delete(f"{self.prefix}kv:{key}")
+
+    @contextmanager
+    def lock(self, name: str, timeout: float = 30.0, lease: float = 300.0):
+        lock = self.client.lock(f"{self.prefix}lock:{name}", timeout=lease,
+                                blocking_timeout=timeout)
+        if not lock.acquire():
+            raise TimeoutError(f"could not acquire lock {name!r}")
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "url": self.url}
+
+    def close(self):
+        self.client.close()
+
+
+def create_shared_state(backend: str = SHARED_STATE_BACKEND):
+    """The backend named by SHARED_STATE_BACKEND"""
+    if backend == "memory":
+        if WEB_CONCURRENCY > 1:
+            print(f"Warning: {WEB_CONCURRENCY} workers with SHARED_STATE_BACKEND=memory; "
+                  "rate limits and live stats will be per worker")
+        return MemoryState()
+    if backend == "sqlite":
+        return SQLiteState()
+    if backend == "redis":
+        return RedisState()
+    raise ValueError(f"Unknown SHARED_STATE_BACKEND {backend!r}; "
+                     "expected memory, sqlite or redis")
+
+
+shared_state = create_shared_state()
@@ -0,0 +1,207 @@
+"""
+In-memory serving of the HTML pages and frontend assets.
+
+Files are read once at startup and kept with pre-compressed gzip (and, if
+the optional `brotli` package is installed, brotli) variants, so a request
+is a dictionary lookup. Responses carry an ETag and Last-Modified, and
+conditional requests are answered with 304 Not Modified.
+
+References to /static/<file> in the pages are rewritten to
+/static/<file>?v=<content hash>. Requests carrying the current hash are
+cached by browsers for a year; a changed file gets a new hash, so users
+never see a stale copy. Everything else is revalidated on each use, which
+costs a 304 round trip but no download.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Re-read files whose modification time changed (for development)
+STATIC_DEV_RELOAD = os.getenv("STATIC_DEV_RELOAD", "false").lower() in ("1", "true", "yes")
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "31536000"))
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+COMPRESS_MIN_SIZE = 256
+REVALIDATE = "no-cache"
+
+_STATIC_REFERENCE = re.compile(r"""(["'])/static/([^"'?#]+)\1""")
+
+
+class Asset:
+    """One file's bytes, compressed variants and validators"""
+
+    def __init__(self, path: str, body: bytes, mtime: float):
+        self.path = path
+        self.mtime = int(mtime)
+        self.last_modified = formatdate(self.mtime, usegmt=True)
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if media_type == "application/javascript":
+            # Starlette adds the charset to text/* types itself
+            media_type += "; charset=utf-8"
+        self.media_type = media_type
+        self.version = hashlib.sha256(body).hexdigest()[:12]
+
+        # encoding -> (body, etag); the identity variant always exists
+        self.variants = {"identity": (body, f'"{self.version}"')}
+        if media_type.startswith(COMPRESSIBLE_TYPES) and len(body) >= COMPRESS_MIN_SIZE:
+            compressed = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed["br"] = brotli.compress(body, quality=11)
+            for encoding, data in compressed.items():
+                if len(data) < len(body):
+                    self.variants[encoding] = (data, f'"{self.version}-{encoding}"')
+        self.etags = frozenset(etag for _, etag in self.variants.values())
+
+    def choose_encoding(self, accept_encoding: str) -> str:
+        """Best available encoding the client accepts, preferring brotli"""
+        accepted = set()
+        for item in accept_encoding.lower().split(","):
+            coding, *params = item.split(";")
+            quality = 1.0
+            for param in params:
+                key, _, value = param.strip().partition("=")
+                if key == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            if quality > 0:
+                accepted.add(coding.strip())
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+    def not_modified(self, request: Request) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or not tags.isdisjoint(self.etags)
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(if_modified_since).timestamp() >= self.mtime
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def response(self, request: Request, cache_control: str = REVALIDATE) -> Response:
+        encoding = self.choose_encoding(request.headers.get("accept-encoding", ""))
+        body, etag = self.variants[encoding]
+        headers = {
+            "ETag": etag,
+            "Last-Modified": self.last_modified,
+            "Cache-Control": cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if self.not_modified(request):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(body, media_type=self.media_type, headers=headers)
+
+
+class AssetStore:
+    """The frontend's static files and the HTML pages, held in memory"""
+
+    def __init__(self, static_dir: str, pages: Dict[str, str],
+                 dev_reload: bool = STATIC_DEV_RELOAD, max_age: int = STATIC_MAX_AGE):
+        self.static_dir = static_dir
+        self.pages = pages
+        self.dev_reload = dev_reload
+        self.max_age = max_age
+        self._static: Dict[str, Asset] = {}
+        self._pages: Dict[str, Asset] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._loaded = False
+
+    def load(self):
+        """Read every static file and page; pages link to the current versions"""
+        static, mtimes = {}, {}
+        if os.path.isdir(self.static_dir):
+            for directory, _, files in os.walk(self.static_dir):
+                for name in files:
+                    path = os.path.join(directory, name)
+                    relative = os.path.relpath(path, self.static_dir).replace(os.sep, "/")
+                    static[relative] = self._read(path, mtimes)
+
+        def versioned(match):
+            asset = static.get(match.group(2))
+            if asset is None:
+                return match.group(0)
+            quote = match.group(1)
+            return f"{quote}/static/{match.group(2)}?v={asset.version}{quote}"
+
+        pages = {}
+        for name, path in self.pages.items():
+            if os.path.exists(path):
+                page = self._read(path, mtimes)
+                html = page.variants["identity"][0].decode("utf-8")
+                html = _STATIC_REFERENCE.sub(versioned, html)
+                pages[name] = Asset(path, html.encode("utf-8"), page.mtime)
+
+        self._static, self._pages, self._mtimes = static, pages, mtimes
+        self._loaded = True
+
+    @staticmethod
+    def _read(path: str, mtimes: Dict[str, float]) -> Asset:
+        mtime = os.path.getmtime(path)
+        with open(path, "rb") as f:
+            body = f.read()
+        mtimes[path] = mtime
+        return Asset(path, body, mtime)
+
+    def _changed(self) -> bool:
+        for path, mtime in self._mtimes.items():
+            try:
+                if os.path.getmtime(path) != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _ensure_loaded(self):
+        if not self._loaded or (self.dev_reload and self._changed()):
+            self.load()
+
+    def page(self, name: str) -> Optional[Asset]:
+        self._ensure_loaded()
+        return self._pages.get(name)
+
+    def static(self, path: str) -> Optional[Asset]:
+        self._ensure_loaded()
+        return self._static.get(path)
+
+    def static_response(self, request: Request, path: str) -> Optional[Response]:
+        """Response for /static/<path>, or None if there is no such file"""
+        asset = self.static(path)
+        if asset is None:
+            return None
+        if request.query_params.get("v") == asset.version:
+            cache_control = f"public, max-age={self.max_age}, immutable"
+        else:
+            cache_control = REVALIDATE
+        return asset.response(request, cache_control)
+
+
+asset_store = AssetStore(
+    static_dir=os.path.join(BASE_DIR, "frontend"),
+    pages={
+        "demo": os.path.join(BASE_DIR, "frontend", "index.html"),
+        "dashboard": os.path.join(BASE_DIR, "dashboard.html"),
+    },
+)
@@ -0,0 +1,251 @@
+"""
+Live statistics pushed to dashboards.
+
+One StatsFeed per process keeps the /stats figures in memory: it reads the
+summary table once at startup and then counts interactions as they are
+logged. Every STATS_PUSH_INTERVAL seconds it sends what changed to every
+connected dashboard, so the database load does not depend on how many
+dashboards are open. Every STATS_RESYNC_INTERVAL seconds it re-reads the
+summary table (plus whatever is still waiting for the log writer), which
+corrects any drift such as interactions that failed to write.
+
+With several workers each one logs only its own interactions. The counts
+are then exchanged through the shared state backend: on every push a
+worker adds what it logged to shared counters and applies whatever all
+workers added since its previous push, so every dashboard sees every
+interaction whichever worker it is connected to.
+"""
+import asyncio
+import os
+import threading
+from collections import Counter
+from typing import Optional, Set
+
+import analytics
+import metrics
+from database import SessionLocal
+from shared_state import shared_state
+
+STATS_PUSH_INTERVAL = float(os.getenv("STATS_PUSH_INTERVAL", "0.5"))
+STATS_RESYNC_INTERVAL = float(os.getenv("STATS_RESYNC_INTERVAL", "60"))
+STATS_SUBSCRIBER_QUEUE = int(os.getenv("STATS_SUBSCRIBER_QUEUE", "32"))
+# Seconds between comment lines that keep idle connections open through proxies
+STATS_KEEPALIVE = float(os.getenv("STATS_KEEPALIVE", "15"))
+
+# Shared counter holding the counts logged by every worker
+SHARED_COUNTER = "stats_feed"
+
+# analytics dimension -> /stats field
+FIELDS = {
+    "language": "language_distribution",
+    "intent": "intent_distribution",
+    "hour": "hourly_interactions",
+}
+
+
+def _counts(rows) -> Counter:
+    return analytics.aggregate((row.get("language"), row.get("intent"), row.get("timestamp"))
+                               for row in rows)
+
+
+def _encode(counts: Counter) -> dict:
+    return {f"{dimension}:{bucket}": count for (dimension, bucket), count in counts.items()}
+
+
+def _decode(fields: dict) -> Counter:
+    return Counter({tuple(field.split(":", 1)): count for field, count in fields.items()})
+
+
+class StatsFeed:
+    """In-memory /stats figures with change notifications"""
+
+    def __init__(self, session_factory=SessionLocal,
+                 push_interval: float = STATS_PUSH_INTERVAL,
+                 resync_interval: float = STATS_RESYNC_INTERVAL,
+                 queue_size: int = STATS_SUBSCRIBER_QUEUE,
+                 state=shared_state):
+        self.session_factory = session_factory
+        self.state = state
+        self.push_interval = push_interval
+        self.resync_interval = resync_interval
+        self.queue_size = queue_size
+        self._stats = None
+        # Counts logged since the last push, and logged but not yet written
+        self._pending = Counter()
+        self._unwritten = Counter()
+        # Shared counter values already applied
+        self._seen = Counter()
+        self._lock = threading.Lock()
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._rasa_seen = (0, 0.0)
+        self._rasa_latency_ms = None
+        self.pushes = 0
+
+    async def start(self):
+        """Load the current figures and start pushing updates"""
+        await self.resync()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for queue in list(self._subscribers):
+            self._send(queue, None)
+
+    # Interaction log listener
+
+    def logged(self, rows):
+        """Count interactions accepted by the log writer"""
+        counts = _counts(rows)
+        with self._lock:
+            self._pending.update(counts)
+            self._unwritten.update(counts)
+
+    def written(self, rows):
+        """The writer is done with rows (written or failed); the DB is authoritative"""
+        counts = _counts(rows)
+        with self._lock:
+            self._unwritten.subtract(counts)
+            self._unwritten = +self._unwritten
+
+    # Subscribers
+
+    def subscribe(self) -> asyncio.Queue:
+        """Queue of messages for one dashboard, starting with a snapshot"""
+        queue = asyncio.Queue(self.queue_size)
+        self._subscribers.add(queue)
+        queue.put_nowait(self.snapshot())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def _send(self, queue: asyncio.Queue, message):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A dashboard that fell behind starts over from a snapshot
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(self.snapshot() if message is not None else None)
+
+    def _broadcast(self, message: dict):
+        for queue in list(self._subscribers):
+            self._send(queue, message)
+        self.pushes += 1
+
+    # Figures
+
+    def snapshot(self) -> dict:
+        stats = self._stats or {"total_interactions": 0, "language_distribution": {},
+                                "intent_distribution": {}, "hourly_interactions": {}}
+        return {"type": "snapshot", **stats, **self._rates()}
+
+    def _rates(self) -> dict:
+        stats = self._stats or {}
+        total = stats.get("total_interactions", 0)
+        fallbacks = stats.get("intent_distribution", {}).get("fallback", 0)
+        return {
+            "fallback_rate": fallbacks / total if total else 0.0,
+            "rasa_latency_ms": self._rasa_latency_ms,
+        }
+
+    def _update_latency(self) -> bool:
+        """Mean Rasa call latency since the last push; False if there were no calls"""
+        count, seconds = metrics.STAGE_SECONDS.totals(("rasa",))
+        seen_count, seen_seconds = self._rasa_seen
+        self._rasa_seen = (count, seconds)
+        if count == seen_count:
+            return False
+        self._rasa_latency_ms = (seconds - seen_seconds) / (count - seen_count) * 1000
+        return True
+
+    def _apply(self, counts: Counter):
+        stats = self._stats
+        for (dimension, bucket), count in counts.items():
+            if dimension == "total":
+                stats["total_interactions"] += count
+            else:
+                field = stats[FIELDS[dimension]]
+                field[bucket] = field.get(bucket, 0) + count
+        hourly = stats["hourly_interactions"]
+        for bucket in sorted(hourly)[:-analytics.HOURLY_BUCKETS]:
+            del hourly[bucket]
+
+    def _collect(self) -> Counter:
+        """Counts logged since the last push, by this worker or, with shared
+        state, by any worker"""
+        with self._lock:
+            counts, self._pending = self._pending, Counter()
+        if not self.state.shared:
+            return counts
+        self.state.incr_many(SHARED_COUNTER, _encode(counts))
+        totals = _decode(self.state.counts(SHARED_COUNTER))
+        counts, self._seen = totals - self._seen, totals
+        return counts
+
+    def push(self, counts: Optional[Counter] = None):
+        """Apply and send the counts logged since the last push"""
+        if counts is None:
+            counts = self._collect()
+        if self._stats is None:
+            return
+        if counts:
+            self._apply(counts)
+        if not self._update_latency() and not counts:
+            return
+
+        delta = {"type": "delta", "total_interactions": counts.get(("total", "all"), 0)}
+        for dimension, field in FIELDS.items():
+            delta[field] = {bucket: count for (d, bucket), count in counts.items()
+                            if d == dimension}
+        self._broadcast({**delta, **self._rates()})
+
+    async def resync(self):
+        """Re-read the figures from the summary table and send a snapshot"""
+        stats = await asyncio.to_thread(self._load)
+        # Counts shared until now are either in the database or unwritten
+        await asyncio.to_thread(self._collect)
+        with self._lock:
+            # Logged interactions the writer has not stored yet
+            unwritten = Counter(self._unwritten)
+        self._stats = stats
+        self._apply(unwritten)
+        self._broadcast(self.snapshot())
+
+    def _load(self) -> dict:
+        db = self.session_factory()
+        try:
+            return analytics.get_stats(db)
+        finally:
+            db.close()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_resync = loop.time() + self.resync_interval
+        while True:
+            await asyncio.sleep(self.push_interval)
+            try:
+                if loop.time() >= next_resync:
+                    next_resync = loop.time() + self.resync_interval
+                    await self.resync()
+                else:
+                    self.push(await asyncio.to_thread(self._collect))
+            except Exception as e:
+                print(f"Error updating live stats: {e}")
+
+    def stats(self) -> dict:
+        return {"subscribers": self.subscribers, "pushes": self.pushes}
+
+
+stats_feed = StatsFeed()
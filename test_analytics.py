@@ -0,0 +1,80 @@
+"""
+Tests that the incrementally maintained stats match the raw interaction log
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+import analytics
+from database import Base, UserInteraction
+from interaction_log import InteractionLogger
+
+
+def make_session_factory(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'stats.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def raw_stats(db):
+    """The full-table scans /stats used to run"""
+    return {
+        "total_interactions": db.query(UserInteraction).count(),
+        "language_distribution": dict(db.query(
+            UserInteraction.language, func.count(UserInteraction.id)).group_by(
+            UserInteraction.language).all()),
+        "intent_distribution": dict(db.query(
+            UserInteraction.intent, func.count(UserInteraction.id)).group_by(
+            UserInteraction.intent).all()),
+    }
+
+
+def test_incremental_stats_match_raw_log_and_rebuild(tmp_path):
+    session_factory = make_session_factory(tmp_path)
+    logger = InteractionLogger(session_factory, batch_size=7, flush_interval=0.01)
+    languages = ["en", "hi", "or"]
+    intents = ["rasa_processed", "fallback"]
+
+    async def run():
+        await logger.start()
+        for i in range(100):
+            await logger.log(f"user_{i % 13}", "msg", "reply",
+                             intents[i % 2], languages[i % 3])
+        await logger.stop()
+
+    asyncio.run(run())
+
+    # Rows logged directly (not through the writer) in an earlier hour
+    db = session_factory()
+    earlier = datetime.utcnow() - timedelta(hours=3)
+    db.add_all([UserInteraction(sender_id="old", message="m", response="r",
+                                intent="fallback", language="or", timestamp=earlier)
+                for _ in range(5)])
+    db.commit()
+
+    expected = raw_stats(db)
+    incremental = analytics.get_stats(db)
+    assert incremental["total_interactions"] == 100
+
+    assert analytics.rebuild(db) == 105
+    rebuilt = analytics.get_stats(db)
+    for key, value in expected.items():
+        assert rebuilt[key] == value
+    assert sum(rebuilt["hourly_interactions"].values()) == 105
+    assert rebuilt["hourly_interactions"][analytics.hour_bucket(earlier)] == 5
+    db.close()
+
+
+def test_ensure_built_backfills_existing_log(tmp_path):
+    session_factory = make_session_factory(tmp_path)
+    db = session_factory()
+    db.add(UserInteraction(sender_id="s", message="m", response="r",
+                           intent="fallback", language="en"))
+    db.commit()
+
+    analytics.ensure_built(session_factory)
+    assert analytics.get_stats(db)["language_distribution"] == {"en": 1}
+    db.close()
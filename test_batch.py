@@ -0,0 +1,47 @@
+"""
+Tests for the batch chat endpoint
+"""
+import time
+
+from fastapi.testclient import TestClient
+
+import main
+from benchmarks.stub_rasa import StubRasaServer
+from rasa_client import RasaClient
+
+
+def test_batch_preserves_order_and_runs_senders_concurrently(monkeypatch):
+    stub = StubRasaServer(latency=0.1).start()
+    monkeypatch.setattr(main, "rasa_client", RasaClient(base_url=stub.url))
+
+    messages = [{"message": f"msg {turn}", "sender_id": f"sender_{sender}", "language": "en"}
+                for turn in range(3) for sender in range(8)]
+
+    with TestClient(main.app) as client:
+        flushed_before = main.interaction_logger.stats()["flushed"]
+        start = time.perf_counter()
+        reply = client.post("/chat/batch", json={"messages": messages})
+        elapsed = time.perf_counter() - start
+    stub.stop()
+
+    assert reply.status_code == 200
+    responses = reply.json()["responses"]
+    assert [r["response"] for r in responses] == [
+        f"stub reply to: {m['message']}" for m in messages]
+
+    # 24 calls of 100 ms, but only 3 sequential turns per sender
+    assert elapsed < 24 * 0.1 / 2
+    for sender in range(8):
+        sent = [m for s, m in stub.received if s == f"sender_{sender}"]
+        assert sent == ["msg 0", "msg 1", "msg 2"]
+
+    stats = main.interaction_logger.stats()
+    assert stats["flushed"] - flushed_before == len(messages)
+
+
+def test_oversized_batch_is_rejected(monkeypatch):
+    monkeypatch.setattr(main, "BATCH_MAX_SIZE", 2)
+    with TestClient(main.app) as client:
+        reply = client.post("/chat/batch", json={"messages": [
+            {"message": "hi", "sender_id": "s"}] * 3})
+    assert reply.status_code == 413
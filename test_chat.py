@@ -11,7 +11,12 @@ sys.path.append(os.path.dirname(__file__))
 
 def test_chatbot():
     """Test the chatbot with various queries"""
-    client = TestClient(app)
+    with TestClient(app) as client:
+        run_test_cases(client)
+
+
+def run_test_cases(client):
+    """Send each test case to /chat and print the result"""
 
     # Test cases
     test_cases = [
@@ -0,0 +1,73 @@
+"""
+Tests for the Rasa circuit breaker
+"""
+import time
+
+from fastapi.testclient import TestClient
+
+import main
+from benchmarks.stub_rasa import StubRasaServer
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from rasa_client import RasaClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_opens_on_failure_rate_and_probes_after_cooldown():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=4, window=10,
+                             cooldown=30, clock=clock)
+
+    for ok in [True, False, True]:
+        assert breaker.allow_request()
+        breaker.record_success() if ok else breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+    clock.now = 31
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now = 62
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.stats()["times_opened"] == 2
+
+
+def test_rasa_outage_degrades_to_fast_fallback(monkeypatch):
+    stub = StubRasaServer(latency=0.2, error_rate=1.0).start()
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=3, cooldown=0.5)
+    monkeypatch.setattr(main, "rasa_client", RasaClient(base_url=stub.url, breaker=breaker))
+
+    with TestClient(main.app) as client:
+        for _ in range(3):
+            client.post("/chat", json={"message": "fever", "sender_id": "s"})
+        assert client.get("/health").json()["rasa_circuit"]["state"] == OPEN
+        assert client.get("/health").json()["status"] == "degraded"
+
+        start = time.perf_counter()
+        reply = client.post("/chat", json={"message": "fever", "sender_id": "s"})
+        assert time.perf_counter() - start < 0.1
+        assert reply.json()["intent"] == "fallback"
+        assert stub.request_count == 3
+
+        # Rasa recovers; after the cooldown a probe closes the circuit
+        stub.error_rate = 0.0
+        time.sleep(0.5)
+        reply = client.post("/chat", json={"message": "fever", "sender_id": "s"})
+        assert reply.json()["intent"] == "rasa_processed"
+        assert client.get("/health").json()["rasa_circuit"]["state"] == CLOSED
+    stub.stop()
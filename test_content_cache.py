@@ -0,0 +1,64 @@
+"""
+Tests for the HealthContent read-through cache
+"""
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from content_cache import HealthContentCache, health_content_cache
+from database import Base, HealthContent
+
+
+def make_session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'content.db'}")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def test_preload_serves_from_memory(tmp_path):
+    session_factory = make_session_factory(tmp_path)
+    db = session_factory()
+    db.add(HealthContent(topic="vaccination", language="en", title="t", content="c"))
+    db.commit()
+
+    cache = HealthContentCache()
+    assert cache.preload(session_factory) == 1
+    assert cache.get("vaccination", "en", db).content == "c"
+    assert cache.get("unknown", "en", db) is None
+    assert cache.get("unknown", "en", db) is None
+    db.close()
+
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_eviction_and_ttl(tmp_path):
+    session_factory = make_session_factory(tmp_path)
+    db = session_factory()
+
+    cache = HealthContentCache(max_size=2)
+    for topic in ["a", "b", "c"]:
+        cache.get(topic, "en", db)
+    assert cache.stats()["evictions"] == 1
+
+    cache = HealthContentCache(ttl=0)
+    cache.get("a", "en", db)
+    cache.get("a", "en", db)
+    assert cache.stats()["misses"] == 2
+    db.close()
+
+
+def test_commit_invalidates_changed_content(tmp_path):
+    session_factory = make_session_factory(tmp_path)
+    db = session_factory()
+    health_content_cache.invalidate()
+
+    assert health_content_cache.get("maternal_care", "or", db) is None
+    db.add(HealthContent(topic="maternal_care", language="or", title="t", content="new"))
+    db.commit()
+    assert health_content_cache.get("maternal_care", "or", db).content == "new"
+
+    row = db.query(HealthContent).filter_by(topic="maternal_care").one()
+    row.content = "edited"
+    db.commit()
+    assert health_content_cache.get("maternal_care", "or", db).content == "edited"
+    db.close()
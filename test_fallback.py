@@ -0,0 +1,50 @@
+"""
+Tests for the data-driven fallback engine
+"""
+from fallback import FallbackEngine, KeywordMatcher, fallback_engine
+from main import get_fallback_response
+
+
+def test_topics_in_each_language():
+    assert get_fallback_response("Hello, I have a fever", "en").startswith("For fever")
+    assert get_fallback_response("मुझे बुखार है", "hi").startswith("बुखार के लिए")
+    assert get_fallback_response("ନମସ୍କାର", "or").startswith("ନମସ୍କାର!")
+    assert fallback_engine.match("matharu batha") == "headache"
+
+
+def test_earlier_topic_wins_regardless_of_position():
+    # Greeting comes first in the message but fever is listed first
+    assert fallback_engine.match("hello, I have a FEVER") == "fever"
+
+
+def test_unknown_message_gets_default_reply():
+    topic, reply = fallback_engine.respond("what is the time", "en")
+    assert topic is None
+    assert reply == fallback_engine.default["en"]
+
+
+def test_equivalent_unicode_spellings_match():
+    # U+0B5C (ODIA LETTER RRA) is NFC-equivalent to U+0B21 U+0B3C
+    engine = FallbackEngine(
+        [{"topic": "t", "keywords": {"or": ["\u0b21\u0b3c"]}, "responses": {"en": "x"}}],
+        {"en": "default"})
+    assert engine.match("\u0b17\u0b5c") == "t"
+    assert engine.match("\u0b17\u0b21\u0b3c") == "t"
+
+
+def test_overlapping_keywords():
+    matcher = KeywordMatcher([("he", 2), ("she", 1), ("hers", 0)])
+    assert matcher.best_match("ushers") == 0
+    assert matcher.best_match("ushe") == 1
+    assert matcher.best_match("xhe") == 2
+    assert matcher.best_match("xyz") is None
+
+
+def test_latin_keywords_match_whole_words_only():
+    matcher = KeywordMatcher([("hi", 1), ("fever", 0), ("ज्वर", 2)], whole_words=True)
+    assert matcher.best_match("which one is this") is None
+    assert matcher.best_match("hi, fever?") == 0
+    assert matcher.best_match("feverish") is None
+    assert matcher.best_match("(hi)") == 1
+    # Other scripts still match inside words
+    assert matcher.best_match("ज्वरा") == 2
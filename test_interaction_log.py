@@ -0,0 +1,75 @@
+"""
+Tests for the background interaction log writer
+"""
+import asyncio
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, UserInteraction, create_db_engine
+from interaction_log import InteractionLogger
+
+
+def make_session_factory(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'log.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def test_rows_are_flushed_in_batches_and_drained_on_stop(tmp_path):
+    session_factory = make_session_factory(tmp_path)
+    logger = InteractionLogger(session_factory, batch_size=100, flush_interval=5)
+
+    async def run():
+        await logger.start()
+        for i in range(250):
+            await logger.log(f"user_{i}", "fever", "rest", "fallback", "en")
+        await logger.stop()
+
+    asyncio.run(run())
+
+    db = session_factory()
+    assert db.query(UserInteraction).count() == 250
+    db.close()
+    stats = logger.stats()
+    assert stats["flushed"] == 250
+    assert stats["dropped"] == 0
+    assert stats["flushes"] <= 4
+
+
+def test_full_queue_drops_rows(tmp_path):
+    session_factory = make_session_factory(tmp_path)
+    logger = InteractionLogger(session_factory, max_queue=10, batch_size=1000,
+                               flush_interval=5, enqueue_timeout=0)
+
+    async def run():
+        await logger.start()
+        results = [await logger.log("user", "hi", "hello", "fallback", "en")
+                   for _ in range(20)]
+        await logger.stop()
+        return results
+
+    results = asyncio.run(run())
+
+    assert results.count(False) == logger.dropped > 0
+    assert logger.flushed == 20 - logger.dropped
+
+
+def test_writer_thread_sees_in_memory_database_tables():
+    engine = create_db_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    logger = InteractionLogger(session_factory)
+
+    async def run():
+        await logger.start()
+        await logger.log("user", "fever", "rest", "fallback", "en")
+        await logger.stop()
+
+    asyncio.run(run())
+
+    db = session_factory()
+    assert db.query(UserInteraction).count() == 1
+    db.close()
+    assert logger.stats()["failed"] == 0
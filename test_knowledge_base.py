@@ -0,0 +1,70 @@
+"""
+Tests for the custom actions' health advice knowledge base
+"""
+import json
+import os
+
+from actions.knowledge_base import KnowledgeBase, detect_script_language
+
+ADVICE = {
+    "default": {"en": "Ask me about fever.", "hi": "मुझसे बुखार के बारे में पूछें।"},
+    "advice": {
+        "ask_fever": {
+            "default": {"en": "Rest and drink fluids.", "hi": "आराम करें।"},
+            "age:child": {"en": "Keep the child hydrated."},
+            "symptom:chills": {"en": ["Keep warm.", "Use a blanket."]},
+        }
+    },
+}
+
+
+def make_kb(tmp_path, data=ADVICE) -> KnowledgeBase:
+    path = tmp_path / "advice.json"
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return KnowledgeBase(str(path), include_db=False, reload_interval=0)
+
+
+def test_lookup_prefers_user_language(tmp_path):
+    kb = make_kb(tmp_path)
+    assert kb.lookup("ask_fever", "hi") == "आराम करें।"
+    # An age-specific English reply does not beat the user's language
+    assert kb.lookup("ask_fever", "hi", age=5) == "आराम करें।"
+    # Languages without content fall back to English
+    assert kb.lookup("ask_fever", "or") == "Rest and drink fluids."
+
+
+def test_lookup_prefers_entities(tmp_path):
+    kb = make_kb(tmp_path)
+    assert kb.lookup("ask_fever", "en", age="5") == "Keep the child hydrated."
+    assert kb.lookup("ask_fever", "en", age=30) == "Rest and drink fluids."
+    assert kb.lookup("ask_fever", "en", symptom="Chills", age=5) in ("Keep warm.", "Use a blanket.")
+    assert kb.lookup("ask_unknown", "en") is None
+    assert kb.default_reply("or") == "Ask me about fever."
+
+
+def test_edits_are_reloaded(tmp_path):
+    kb = make_kb(tmp_path)
+    data = json.loads(json.dumps(ADVICE))
+    data["advice"]["ask_fever"]["default"]["en"] = "Updated advice."
+    path = tmp_path / "advice.json"
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert kb.lookup("ask_fever", "en") == "Updated advice."
+
+
+def test_broken_edit_keeps_previous_content(tmp_path):
+    kb = make_kb(tmp_path)
+    path = tmp_path / "advice.json"
+    path.write_text("{", encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert kb.lookup("ask_fever", "en") == "Rest and drink fluids."
+
+
+def test_detect_script_language():
+    assert detect_script_language("मुझे बुखार है") == "hi"
+    assert detect_script_language("ମୋର ଜ୍ବର") == "or"
+    assert detect_script_language("I have fever") is None
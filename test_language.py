@@ -0,0 +1,59 @@
+"""
+Tests for server-side language detection
+"""
+from fastapi.testclient import TestClient
+
+import main
+from benchmarks.stub_rasa import StubRasaServer
+from language import detect_language, detect_romanized, detect_script, normalize_message
+from rasa_client import RasaClient
+
+
+def test_script_detection():
+    assert detect_script("ମୋର ଜ୍ବର ଅଛି") == "or"
+    assert detect_script("मुझे बुखार है") == "hi"
+    assert detect_script("I have a fever") is None
+    # Mostly Odia with one Devanagari letter
+    assert detect_script("ମୋର ଜ୍ବର क") == "or"
+
+
+def test_romanized_heuristics():
+    assert detect_romanized("bukhar hai") == "hi"
+    assert detect_romanized("fever kam karne ke liye kya kare") == "hi"
+    assert detect_romanized("moro jwor achi") == "or"
+    assert detect_romanized("matharu dukhuchi") == "or"
+    assert detect_romanized("I have a headache") is None
+
+
+def test_requested_language_is_kept_unless_script_disagrees():
+    assert detect_language("ମୋର ଜ୍ବର ଅଛି", "en") == "or"
+    assert detect_language("bukhar hai", "en") == "en"
+    assert detect_language("bukhar hai") == "hi"
+    assert detect_language("hello") == "en"
+
+
+def test_messages_are_nfc_normalized():
+    # U+0B5C ODIA LETTER RRA is written as DDA + NUKTA in NFC
+    assert normalize_message("\u0b5c") == "\u0b21\u0b3c"
+    # Precomposed Latin letters are composed
+    assert normalize_message("cafe\u0301") == "caf\u00e9"
+    assert normalize_message("plain") == "plain"
+
+
+def test_chat_uses_detected_language(monkeypatch):
+    stub = StubRasaServer(error_rate=1.0).start()
+    monkeypatch.setattr(main, "rasa_client", RasaClient(base_url=stub.url))
+
+    with TestClient(main.app) as client:
+        odia = client.post("/chat", json={
+            "message": "ମୋର ଜ୍ବର ଅଛି", "sender_id": "lang_1", "language": "en"}).json()
+        romanized = client.post("/chat", json={
+            "message": "mujhe bukhar hai", "sender_id": "lang_2"}).json()
+        chosen = client.post("/chat", json={
+            "message": "mujhe bukhar hai", "sender_id": "lang_3", "language": "en"}).json()
+    stub.stop()
+
+    assert odia["language"] == "or"
+    assert romanized["language"] == "hi"
+    assert romanized["response"].startswith("बुखार के लिए")
+    assert chosen["language"] == "en"
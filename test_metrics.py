@@ -0,0 +1,71 @@
+"""
+Tests for /metrics and the per-request timing header
+"""
+from fastapi.testclient import TestClient
+
+import main
+import metrics
+from benchmarks.stub_rasa import StubRasaServer
+from rasa_client import RasaClient
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("h_seconds", "help", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, ("rasa",))
+    lines = list(histogram.samples())
+    assert lines[:3] == [
+        'h_seconds_bucket{stage="rasa",le="0.1"} 1',
+        'h_seconds_bucket{stage="rasa",le="1.0"} 2',
+        'h_seconds_bucket{stage="rasa",le="+Inf"} 3',
+    ]
+    assert lines[-1] == 'h_seconds_count{stage="rasa"} 3'
+
+
+def test_chat_reports_stage_timings(monkeypatch):
+    stub = StubRasaServer(latency=0.05).start()
+    monkeypatch.setattr(main, "rasa_client", RasaClient(base_url=stub.url))
+
+    with TestClient(main.app) as client:
+        rasa_before = metrics.STAGE_SECONDS.count(("rasa",))
+        reply = client.post("/chat", json={"message": "fever", "sender_id": "metrics_1"})
+        stub.error_rate = 1.0
+        fallback = client.post("/chat", json={"message": "fever", "sender_id": "metrics_2"})
+        exposition = client.get("/metrics")
+    stub.stop()
+
+    assert reply.status_code == 200
+    assert reply.json()["response"] == "stub reply to: fever"
+    timings = dict(part.split(";dur=") for part in reply.headers["Server-Timing"].split(", "))
+    assert set(timings) >= {"rasa", "log", "serialize", "total"}
+    assert float(timings["rasa"]) >= 50
+    assert float(timings["total"]) >= float(timings["rasa"])
+    assert "fallback" in fallback.headers["Server-Timing"]
+
+    assert metrics.STAGE_SECONDS.count(("rasa",)) == rasa_before + 2
+    assert exposition.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = exposition.text
+    assert 'http_requests_total{method="POST",path="/chat",status="200"}' in text
+    assert 'rasa_errors_total{reason="status"}' in text
+    assert 'chat_replies_total{source="fallback"}' in text
+    assert 'db_pool_connections{state="checked_out"}' in text
+    assert 'rasa_circuit_state{state="closed"} 1' in text
+
+
+def test_requests_are_counted_per_route_not_per_endpoint():
+    # "/" and "/demo" are served by the same function
+    def count(path):
+        return metrics.HTTP_REQUESTS.value(("GET", path, "200"))
+
+    with TestClient(main.app) as client:
+        before = count("/"), count("/demo"), count("/static/{path:path}")
+        client.get("/demo")
+        client.get("/")
+        client.get("/")
+        client.get("/static/script.js")
+        missing = client.get("/no-such-page")
+
+    assert missing.status_code == 404
+    assert (count("/"), count("/demo"), count("/static/{path:path}")) == (
+        before[0] + 2, before[1] + 1, before[2] + 1)
+    assert metrics.HTTP_REQUESTS.value(("GET", "unmatched", "404")) >= 1
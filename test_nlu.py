@@ -0,0 +1,87 @@
+"""
+Tests for the in-process NLU fast path
+"""
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from benchmarks.bench_nlu import story_turns
+from benchmarks.stub_rasa import StubRasaServer
+from nlu import IntentClassifier, NLUFastPath, context_free_actions, nlu_fast_path
+from rasa_client import RasaClient
+
+TEST_STORIES = os.path.join(os.path.dirname(__file__), "tests", "test_stories.yml")
+
+
+def test_classifier_ranks_the_closest_examples():
+    classifier = IntentClassifier([
+        ("greet", "hello there"), ("greet", "namaste"),
+        ("ask_fever", "I have a fever"), ("ask_fever", "मुझे बुखार है"),
+    ])
+    intent, confidence, lead = classifier.classify("Hello there!")
+    assert intent == "greet" and confidence == pytest.approx(1.0)
+    assert lead == pytest.approx(1.0)
+    assert classifier.classify("मुझे बुखार है")[0] == "ask_fever"
+    assert classifier.classify("i have fever")[0] == "ask_fever"
+    assert classifier.classify("xyz") == (None, 0.0, 0.0)
+
+
+def test_only_context_free_intents_are_answered():
+    rules = [{"steps": [{"intent": "goodbye"}, {"action": "utter_goodbye"}]}]
+    stories = [
+        {"steps": [{"intent": "greet"}, {"action": "utter_greet"},
+                   {"intent": "affirm"}, {"action": "utter_happy"}]},
+        {"steps": [{"intent": "greet"}, {"action": "utter_greet"},
+                   {"intent": "goodbye"}, {"action": "utter_goodbye"}]},
+    ]
+    assert context_free_actions(rules, stories) == {
+        "goodbye": ("utter_goodbye",), "greet": ("utter_greet",)}
+
+
+def test_test_stories_are_classified_and_answered_correctly():
+    responses = {intent: [m["text"] for templates in replies for m in templates]
+                 for intent, replies in nlu_fast_path.replies.items()}
+    answered = 0
+    for message, intent, actions in story_turns(TEST_STORIES):
+        assert nlu_fast_path.classifier.classify(message)[0] == intent, message
+        answer = nlu_fast_path.answer(message)
+        if answer is not None:
+            answered += 1
+            assert answer[0] == intent
+            assert [m["text"] for m in answer[1]] == responses[intent]
+            assert len(answer[1]) == len(actions)
+        else:
+            # Replies to follow-ups depend on the conversation; Rasa decides
+            assert intent in ("affirm", "deny", "mood_great", "mood_unhappy")
+    assert answered >= 8
+
+
+def test_fast_path_skips_rasa(monkeypatch):
+    stub = StubRasaServer().start()
+    monkeypatch.setattr(main, "rasa_client", RasaClient(base_url=stub.url))
+
+    with TestClient(main.app) as client:
+        greeting = client.post("/chat", json={"message": "Hello there!", "sender_id": "n1"})
+        streamed = client.post("/chat/stream", json={"message": "bye bye", "sender_id": "n1"})
+        unclear = client.post("/chat", json={"message": "yes", "sender_id": "n1"})
+        stub.error_rate = 1.0
+        outage = client.post("/chat", json={"message": "are you a robot", "sender_id": "n2"})
+    stub.stop()
+
+    assert greeting.json()["intent"] == "fast_path"
+    assert "Ama Arogya" in greeting.json()["response"]
+    assert '"intent": "fast_path"' in streamed.text
+    assert unclear.json()["response"] == "stub reply to: yes"
+    # With Rasa down a less certain match still gets the domain's reply
+    assert outage.json()["intent"] == "fallback"
+    assert "AI health assistant" in outage.json()["response"]
+    assert stub.request_count == 2
+
+
+def test_disabled_without_training_data(tmp_path):
+    fast_path = NLUFastPath.from_files(nlu_paths=str(tmp_path / "missing.yml"),
+                                       domain_path=str(tmp_path / "domain.yml"))
+    assert not fast_path.enabled
+    assert fast_path.answer("hello") is None
@@ -0,0 +1,38 @@
+"""
+Tests for the pooled async Rasa client
+"""
+import asyncio
+import time
+
+from benchmarks.stub_rasa import StubRasaServer
+from rasa_client import RasaClient
+
+
+def test_concurrent_requests_do_not_serialize():
+    """Slow Rasa turns for different senders should overlap"""
+    stub = StubRasaServer(latency=0.3).start()
+    client = RasaClient(base_url=stub.url)
+
+    async def run():
+        try:
+            return await asyncio.gather(*(
+                client.send_message("fever", f"user_{i}") for i in range(8)))
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    stub.stop()
+
+    assert all(r[0]["text"] == "stub reply to: fever" for r in results)
+    assert elapsed < 8 * 0.3 / 2
+
+
+def test_unreachable_rasa_falls_back(monkeypatch):
+    """get_rasa_response returns None when Rasa cannot be reached"""
+    import main
+
+    monkeypatch.setattr(main, "rasa_client", RasaClient(
+        base_url="http://127.0.0.1:9", connect_timeout=0.5))
+    assert asyncio.run(main.get_rasa_response("hello", "test_user")) is None
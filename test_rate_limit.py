@@ -0,0 +1,119 @@
+"""
+Tests for rate limiting and admission control
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+import main
+from benchmarks.stub_rasa import StubRasaServer
+from rasa_client import RasaClient
+from rate_limit import AdmissionController, RateLimiter, TokenBucketLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_burst_and_refill():
+    clock = FakeClock()
+    bucket = TokenBucketLimiter(rate=2, burst=4, clock=clock)
+    for _ in range(4):
+        assert bucket.retry_after("a") == 0
+        bucket.take("a")
+    assert bucket.retry_after("a") == 0.5
+    assert bucket.retry_after("b") == 0
+
+    clock.now = 1.0
+    assert bucket.tokens("a") == 2
+
+
+def test_idle_and_excess_buckets_are_evicted():
+    clock = FakeClock()
+    bucket = TokenBucketLimiter(rate=1, burst=5, max_keys=3, clock=clock)
+    for key in "abcd":
+        bucket.take(key)
+    assert len(bucket) == 3 and bucket.evicted == 1
+
+    # After burst / rate seconds every bucket would be full again
+    clock.now = 5.0
+    bucket.take("e")
+    assert len(bucket) == 1
+
+
+def test_ip_limit_does_not_spend_sender_tokens():
+    clock = FakeClock()
+    limiter = RateLimiter(True, sender_rate=1, sender_burst=5, ip_rate=1, ip_burst=2, clock=clock)
+    assert limiter.check("s1", "ip") == 0
+    assert limiter.check("s2", "ip") == 0
+    assert limiter.check("s3", "ip") > 0
+    assert limiter.senders.tokens("s3") == 5
+    assert limiter.stats()["limited"] == 1
+
+
+def test_burst_from_one_sender_is_limited(monkeypatch):
+    stub = StubRasaServer().start()
+    monkeypatch.setattr(main, "rasa_client", RasaClient(base_url=stub.url))
+    monkeypatch.setattr(main, "rate_limiter", RateLimiter(
+        True, sender_rate=0.1, sender_burst=3, ip_rate=100, ip_burst=100))
+
+    with TestClient(main.app) as client:
+        codes = [client.post("/chat", json={"message": "hi", "sender_id": "noisy"}).status_code
+                 for _ in range(5)]
+        other = client.post("/chat", json={"message": "hi", "sender_id": "quiet"})
+        limited = client.post("/chat/stream", json={"message": "hi", "sender_id": "noisy"})
+    stub.stop()
+
+    assert codes == [200, 200, 200, 429, 429]
+    assert other.status_code == 200
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+
+
+def test_admission_sheds_beyond_queue():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=2, max_queue=1, queue_timeout=0.2)
+        assert await controller.acquire()
+        assert await controller.acquire()
+        # One request may wait, the next is shed immediately
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert not await controller.acquire()
+        controller.release()
+        assert await waiter
+        # A waiter that times out is shed too
+        assert not await controller.acquire()
+        return controller.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["in_flight"] == 2
+    assert stats["queued"] == 0
+    assert stats["admitted"] == 3
+    assert stats["shed"] == 2
+
+
+def test_overload_returns_503(monkeypatch):
+    stub = StubRasaServer(latency=0.3).start()
+    monkeypatch.setattr(main, "rasa_client", RasaClient(base_url=stub.url))
+    monkeypatch.setattr(main, "rate_limiter", RateLimiter(False))
+    monkeypatch.setattr(main.admission_controller, "max_in_flight", 2)
+    monkeypatch.setattr(main.admission_controller, "max_queue", 2)
+    monkeypatch.setattr(main.admission_controller, "queue_timeout", 5)
+
+    with TestClient(main.app) as client:
+        def send(i):
+            return client.post("/chat", json={"message": "fever", "sender_id": f"burst_{i}"})
+
+        with ThreadPoolExecutor(8) as pool:
+            codes = sorted(r.status_code for r in pool.map(send, range(8)))
+        stats = main.admission_controller.stats()
+    stub.stop()
+
+    # Two in flight and two queued are answered; the rest are shed
+    assert codes == [200] * 4 + [503] * 4
+    assert stats["in_flight"] == 0
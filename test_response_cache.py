@@ -0,0 +1,56 @@
+"""
+Tests for the opt-in response cache
+"""
+from fastapi.testclient import TestClient
+
+import main
+from benchmarks.stub_rasa import StubRasaServer
+from rasa_client import RasaClient
+from response_cache import ResponseCache
+
+
+def test_normalized_keys_lru_and_ttl():
+    cache = ResponseCache(enabled=True, max_size=2)
+    cache.put("Fever?", "en", "rest", "rasa_processed")
+    assert cache.get("  fever ", "en") == ("rest", "rasa_processed", [])
+    assert cache.get("fever", "hi") is None
+
+    cache.put("a", "en", "1", "x")
+    cache.put("b", "en", "2", "x")
+    assert cache.get("fever", "en") is None
+    assert cache.stats()["evictions"] == 1
+
+    cache = ResponseCache(enabled=True, ttl=0)
+    cache.put("fever", "en", "rest", "rasa_processed")
+    assert cache.get("fever", "en") is None
+
+
+def test_allow_and_deny_lists():
+    assert not ResponseCache(enabled=False).cacheable("fever")
+    assert not ResponseCache(enabled=True).cacheable(None)
+    assert ResponseCache(enabled=True).cacheable("fever")
+    assert not ResponseCache(enabled=True, deny_intents={"greet"}).cacheable("greet")
+    assert not ResponseCache(enabled=True, allow_intents={"fever"}).cacheable("headache")
+
+
+def test_repeated_question_skips_rasa(monkeypatch):
+    stub = StubRasaServer().start()
+    monkeypatch.setattr(main, "rasa_client", RasaClient(base_url=stub.url))
+    monkeypatch.setattr(main, "response_cache", ResponseCache(enabled=True))
+
+    with TestClient(main.app) as client:
+        first = client.post("/chat", json={"message": "I have had a fever for two days", "sender_id": "a"})
+        second = client.post("/chat", json={"message": "i have had a FEVER for two days!", "sender_id": "b"})
+        follow_up = client.post("/chat", json={"message": "yes", "sender_id": "b"})
+        # Conversational turns that contain a greeting keyword's letters
+        others = [client.post("/chat", json={"message": message, "sender_id": "b"})
+                  for message in ("yes, I think so", "which one?", "Is this serious?",
+                                  "hi, which one?")]
+    stub.stop()
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json()["response"] == first.json()["response"]
+    assert follow_up.headers["X-Cache"] == "BYPASS"
+    assert all(response.headers["X-Cache"] == "BYPASS" for response in others)
+    assert stub.request_count == 6
@@ -0,0 +1,120 @@
+"""
+Tests for per-sender conversation sessions and the history-aware fallback
+"""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import main
+from fallback import fallback_engine
+from rasa_client import RasaClient
+from sessions import SessionStore, extract_age
+from shared_state import MemoryState
+from test_analytics import make_session_factory
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_store(tmp_path, **kwargs):
+    return SessionStore(make_session_factory(tmp_path), state=MemoryState(), **kwargs)
+
+
+def test_recent_turns_are_kept_and_slots_outlive_the_conversation(tmp_path):
+    clock = Clock()
+    store = make_store(tmp_path, max_turns=2, max_text=10, expiry=60, clock=clock)
+
+    async def scenario():
+        session = await store.get("a")
+        for i in range(3):
+            await store.record(session, f"message {i} " * 5, "reply", "hi",
+                               {"symptom": "fever"})
+        session = await store.get("a")
+        turns = list(session.turns)
+        clock.now += 61
+        return turns, await store.get("a")
+
+    turns, later = asyncio.run(scenario())
+    assert turns == [["message 1 ", "reply"], ["message 2 ", "reply"]]
+    assert later.turns == []
+    assert later.slots == {"symptom": "fever"}
+    assert later.language == "hi"
+
+
+def test_memory_stays_under_the_cap_and_evicted_sessions_are_reloaded(tmp_path):
+    clock = Clock()
+    store = make_store(tmp_path, max_bytes=50_000, clock=clock)
+
+    async def scenario():
+        for i in range(1000):
+            session = await store.get(f"sender_{i}")
+            await store.record(session, "I have a fever", "Rest and drink fluids", "or",
+                               {"symptom": "fever", "age": i % 90})
+            clock.now += 1
+        while store.flush():
+            pass
+        return await store.get("sender_3")
+
+    reloaded = asyncio.run(scenario())
+    stats = store.stats()
+    assert stats["memory_bytes"] <= 50_000
+    assert 0 < stats["in_memory"] < 1000
+    assert stats["written"] == 1000
+    assert reloaded.language == "or"
+    assert reloaded.slots == {"symptom": "fever", "age": 3}
+    assert reloaded.turns == [["I have a fever", "Rest and drink fluids"]]
+
+
+def test_idle_sessions_leave_memory(tmp_path):
+    clock = Clock()
+    store = make_store(tmp_path, idle_ttl=10, clock=clock)
+
+    async def scenario():
+        await store.record(await store.get("idle"), "hi", "hello", "en")
+        clock.now += 11
+        await store.record(await store.get("active"), "hi", "hello", "en")
+
+    asyncio.run(scenario())
+    assert store.stats()["in_memory"] == 1
+    assert store.stats()["evicted"] == 1
+
+
+def test_age_is_read_from_messages():
+    assert extract_age("my son is 4 years old") == 4
+    assert extract_age("meri beti 12 saal ki hai") == 12
+    assert extract_age("मेरी उम्र ६० वर्ष है") == 60
+    assert extract_age("ମୋ ପୁଅର ବୟସ ୫ ବର୍ଷ") == 5
+    assert extract_age("I have a fever") is None
+
+
+def test_fallback_follows_up_on_the_conversation(monkeypatch):
+    monkeypatch.setattr(main, "rasa_client", RasaClient(
+        base_url="http://127.0.0.1:9", connect_timeout=0.5))
+    fever = fallback_engine.by_name["fever"]["responses"]
+
+    with TestClient(main.app) as client:
+        def ask(message, sender_id):
+            return client.post("/chat", json={"message": message, "sender_id": sender_id}).json()
+
+        ask("मुझे बुखार है", "session_test_user")
+        follow_up = ask("how long will it last?", "session_test_user")
+        # Another sender asking the same has no conversation to refer to
+        stranger = ask("how long will it last?", "session_test_stranger")
+
+    assert follow_up["response"] == fever["hi"]
+    assert follow_up["language"] == "hi"
+    assert stranger["response"] == fallback_engine.default["en"]
+
+
+def test_follow_ups_containing_greeting_letters_keep_the_topic():
+    # "hi" is a greeting keyword, but only as a whole word
+    fever = fallback_engine.by_name["fever"]["responses"]["en"]
+    for message in ("which medicine should I take?", "what should I do about this",
+                    "something for children?"):
+        assert fallback_engine.respond(message, "en", "fever") == ("fever", fever)
+    assert fallback_engine.respond("hi", "en", "fever")[0] == "greet"
@@ -0,0 +1,138 @@
+"""
+Tests for the shared state backends used by multiple workers
+"""
+import asyncio
+import multiprocessing
+import time
+
+import pytest
+
+from rate_limit import RateLimiter
+from sessions import SessionStore
+from shared_state import MemoryState, SQLiteState
+from stats_feed import StatsFeed
+from test_analytics import make_session_factory
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def state(request, tmp_path):
+    if request.param == "memory":
+        return MemoryState()
+    return SQLiteState(str(tmp_path / "state.db"))
+
+
+def test_tokens_are_taken_from_all_buckets_or_none(state):
+    buckets = [("sender:a", 1, 2), ("ip:x", 1, 3)]
+    assert state.take_tokens(buckets) == 0
+    assert state.take_tokens(buckets) == 0
+    # The sender bucket is empty, so the IP bucket keeps its last token
+    assert state.take_tokens(buckets) > 0.9
+    assert state.take_tokens([("ip:x", 1, 3)]) == 0
+    assert state.take_tokens([("ip:x", 1, 3)]) > 0.9
+
+
+def test_counters_values_and_locks(state):
+    state.incr_many("stats", {"total:all": 2, "language:en": 1})
+    state.incr_many("stats", {"total:all": 1})
+    assert state.counts("stats") == {"total:all": 3, "language:en": 1}
+    assert state.counts("other") == {}
+
+    state.set("session:a", {"turns": ["hi"]})
+    state.set("session:b", [1], ttl=0.001)
+    assert state.get("session:a") == {"turns": ["hi"]}
+    state.delete("session:a")
+    assert state.get("session:a") is None
+    time.sleep(0.01)
+    assert state.get("session:b") is None
+
+    with state.lock("startup"):
+        with pytest.raises(TimeoutError):
+            with state.lock("startup", timeout=0.1):
+                pass
+    with state.lock("startup", timeout=0.1):
+        pass
+
+
+def _spend(path, barrier, results):
+    state = SQLiteState(path)
+    barrier.wait()
+    results.put(sum(state.take_tokens([("sender:shared", 0.001, 20)]) == 0
+                    for _ in range(20)))
+
+
+def test_workers_share_token_buckets(tmp_path):
+    path = str(tmp_path / "state.db")
+    SQLiteState(path)
+    context = multiprocessing.get_context("spawn")
+    barrier, results = context.Barrier(3), context.Queue()
+    workers = [context.Process(target=_spend, args=(path, barrier, results)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    granted = sum(results.get(timeout=60) for _ in workers)
+    for worker in workers:
+        worker.join()
+    # 60 attempts against one bucket of 20 tokens, from three processes
+    assert granted == 20
+
+
+def test_rate_limits_hold_across_workers(tmp_path):
+    path = str(tmp_path / "state.db")
+    first, second = (RateLimiter(True, sender_rate=0.01, sender_burst=2, ip_rate=100,
+                                 ip_burst=100, state=SQLiteState(path)) for _ in range(2))
+    assert first.check("s", "ip") == 0
+    assert second.check("s", "ip") == 0
+    assert first.check("s", "ip") > 0
+    assert second.check("s", "ip") > 0
+    assert second.stats()["shared"]
+
+
+def test_dashboards_see_interactions_from_every_worker(tmp_path):
+    path = str(tmp_path / "state.db")
+    session_factory = make_session_factory(tmp_path)
+
+    async def scenario():
+        workers = [StatsFeed(session_factory, push_interval=3600, state=SQLiteState(path))
+                   for _ in range(2)]
+        for feed in workers:
+            await feed.start()
+        dashboard = workers[1].subscribe()
+        dashboard.get_nowait()
+
+        workers[0].logged([{"language": "or", "intent": "fast_path", "timestamp": None}])
+        workers[0].push()
+        workers[1].push()
+        return dashboard.get_nowait()
+
+    delta = asyncio.run(scenario())
+    assert delta["total_interactions"] == 1
+    assert delta["language_distribution"] == {"or": 1}
+
+
+def test_expired_values_are_purged_without_rate_limiting(tmp_path):
+    clock = [1000.0]
+    state = SQLiteState(str(tmp_path / "state.db"), cleanup_interval=10,
+                        clock=lambda: clock[0])
+    state.set("session:old", {"turns": []}, ttl=5)
+    clock[0] += 20
+    # Only values are written, as when RATE_LIMIT_ENABLED=false
+    state.set("session:new", {"turns": []}, ttl=5)
+    assert state.stats()["values"] == 1
+
+
+def test_shared_rate_limits_and_sessions_from_async_handlers(tmp_path):
+    path = str(tmp_path / "state.db")
+    limiter = RateLimiter(True, sender_rate=0.01, sender_burst=1, ip_rate=100,
+                          ip_burst=100, state=SQLiteState(path))
+    first, second = (SessionStore(make_session_factory(tmp_path), state=SQLiteState(path))
+                     for _ in range(2))
+
+    async def scenario():
+        waits = [await limiter.check_async("s", "ip") for _ in range(2)]
+        await first.record(await first.get("s"), "I have a fever", "rest", "hi",
+                           {"symptom": "fever"})
+        return waits, await second.get("s")
+
+    waits, session = asyncio.run(scenario())
+    assert waits[0] == 0 and waits[1] > 0
+    assert session.slots == {"symptom": "fever"}
+    assert session.turns == [["I have a fever", "rest"]]
@@ -0,0 +1,71 @@
+"""
+Tests for in-memory page and static asset serving
+"""
+import gzip
+import os
+import re
+
+from fastapi.testclient import TestClient
+
+import main
+from static_assets import AssetStore
+
+
+def test_pages_are_compressed_and_revalidated(monkeypatch, tmp_path):
+    # The dashboard is found without running from the repository root
+    monkeypatch.chdir(tmp_path)
+    with TestClient(main.app) as client:
+        page = client.get("/dashboard", headers={"Accept-Encoding": "gzip"})
+        etag = page.headers["ETag"]
+        cached = client.get("/dashboard", headers={
+            "Accept-Encoding": "gzip", "If-None-Match": etag})
+        since = client.get("/", headers={
+            "If-Modified-Since": page.headers["Last-Modified"]})
+        plain = client.get("/demo", headers={"Accept-Encoding": "identity"})
+
+    assert page.status_code == 200
+    assert page.headers["Content-Encoding"] == "gzip"
+    assert page.headers["Cache-Control"] == "no-cache"
+    assert page.headers["Vary"] == "Accept-Encoding"
+    assert "<html" in page.text.lower()
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert since.status_code == 304
+    assert "Content-Encoding" not in plain.headers
+
+
+def test_static_assets_are_fingerprinted():
+    with TestClient(main.app) as client:
+        html = client.get("/demo").text
+        script_url = re.search(r'src="(/static/script\.js\?v=\w+)"', html).group(1)
+        versioned = client.get(script_url)
+        unversioned = client.get("/static/script.js")
+        stale = client.get("/static/script.js?v=old")
+        missing = client.get("/static/missing.js")
+
+    assert versioned.status_code == 200
+    assert versioned.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert "javascript" in versioned.headers["content-type"]
+    assert unversioned.headers["Cache-Control"] == "no-cache"
+    assert stale.headers["Cache-Control"] == "no-cache"
+    assert unversioned.text == versioned.text
+    assert missing.status_code == 404
+
+
+def test_dev_reload_picks_up_edits(tmp_path):
+    static_dir = tmp_path / "static"
+    static_dir.mkdir()
+    (static_dir / "app.css").write_text("body { color: red; }" * 20)
+    (tmp_path / "page.html").write_text('<link href="/static/app.css">')
+    store = AssetStore(str(static_dir), {"page": str(tmp_path / "page.html")}, dev_reload=True)
+
+    css = store.static("app.css")
+    assert gzip.decompress(css.variants["gzip"][0]) == css.variants["identity"][0]
+    assert f"/static/app.css?v={css.version}" in store.page("page").variants["identity"][0].decode()
+
+    (static_dir / "app.css").write_text("body { color: blue; }" * 20)
+    stat = os.stat(static_dir / "app.css")
+    os.utime(static_dir / "app.css", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert store.static("app.css").version != css.version
+    assert store.static("app.css").version in store.page("page").variants["identity"][0].decode()
@@ -0,0 +1,118 @@
+"""
+Tests for the live statistics feed behind /stats/stream
+"""
+import asyncio
+import json
+import time
+
+import httpx
+
+import main
+from benchmarks.load_test import free_port, start_app
+from benchmarks.stub_rasa import StubRasaServer
+from interaction_log import InteractionLogger
+from rasa_client import RasaClient
+from stats_feed import StatsFeed
+from test_analytics import make_session_factory
+
+
+def test_one_database_read_serves_every_dashboard(tmp_path):
+    session_factory = make_session_factory(tmp_path)
+    loads = []
+
+    class CountingFeed(StatsFeed):
+        def _load(self):
+            loads.append(1)
+            return super()._load()
+
+    async def scenario():
+        feed = CountingFeed(session_factory, push_interval=3600, resync_interval=3600)
+        logger = InteractionLogger(session_factory, flush_interval=0.01)
+        logger.listeners.append(feed)
+        await logger.start()
+        await feed.start()
+        queues = [feed.subscribe() for _ in range(5)]
+        assert all(q.get_nowait()["total_interactions"] == 0 for q in queues)
+
+        await logger.log("u1", "hi", "hello", "rasa_processed", "en")
+        await logger.log("u2", "ନମସ୍କାର", "ନମସ୍କାର", "fallback", "or")
+        feed.push()
+        deltas = [q.get_nowait() for q in queues]
+
+        await logger.stop()
+        await feed.resync()
+        snapshot = queues[0].get_nowait()
+        await feed.stop()
+        return deltas, snapshot
+
+    deltas, snapshot = asyncio.run(scenario())
+    assert loads == [1, 1]
+    for delta in deltas:
+        assert delta["type"] == "delta"
+        assert delta["total_interactions"] == 2
+        assert delta["language_distribution"] == {"en": 1, "or": 1}
+        assert delta["fallback_rate"] == 0.5
+    # After the rows are written the database agrees with the pushed counts
+    assert snapshot["type"] == "snapshot"
+    assert snapshot["total_interactions"] == 2
+    assert snapshot["intent_distribution"] == {"rasa_processed": 1, "fallback": 1}
+
+
+def test_resync_counts_rows_not_written_yet(tmp_path):
+    async def scenario():
+        feed = StatsFeed(make_session_factory(tmp_path), push_interval=3600)
+        await feed.start()
+        feed.logged([{"language": "hi", "intent": "fallback", "timestamp": None}])
+        await feed.resync()
+        return feed.snapshot()
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot["total_interactions"] == 1
+    assert snapshot["language_distribution"] == {"hi": 1}
+
+
+def test_dashboards_receive_updates_within_a_second(monkeypatch):
+    stub = StubRasaServer().start()
+    monkeypatch.setattr(main, "rasa_client", RasaClient(base_url=stub.url))
+    port = free_port()
+    server, thread = start_app(port)
+    base_url = f"http://127.0.0.1:{port}"
+
+    async def watch(ready, received):
+        async with httpx.AsyncClient(base_url=base_url, timeout=5) as client:
+            async with client.stream("GET", "/stats/stream") as response:
+                assert response.headers["content-type"].startswith("text/event-stream")
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    message = json.loads(line[len("data: "):])
+                    if message["type"] == "snapshot":
+                        ready.set()
+                    elif message["total_interactions"]:
+                        received.append((time.perf_counter(), message))
+                        return
+
+    async def scenario():
+        ready = [asyncio.Event(), asyncio.Event()]
+        received = []
+        watchers = [asyncio.create_task(watch(event, received)) for event in ready]
+        await asyncio.gather(*(event.wait() for event in ready))
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            sent = time.perf_counter()
+            reply = await client.post("/chat", json={"message": "fever", "sender_id": "live_1"})
+            assert reply.status_code == 200
+        await asyncio.wait_for(asyncio.gather(*watchers), 5)
+        return sent, received
+
+    try:
+        sent, received = asyncio.run(scenario())
+    finally:
+        server.should_exit = True
+        thread.join()
+        stub.stop()
+
+    assert len(received) == 2
+    for arrived, message in received:
+        assert arrived - sent < 1.0
+        assert message["total_interactions"] == 1
+        assert message["intent_distribution"] == {"rasa_processed": 1}
@@ -0,0 +1,81 @@
+"""
+Tests for multi-message replies and the streaming chat endpoint
+"""
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+import main
+from benchmarks.stub_rasa import StubRasaServer
+from rasa_client import RasaClient
+
+
+def test_chat_returns_every_rasa_message(monkeypatch):
+    stub = StubRasaServer(messages_per_turn=3).start()
+    monkeypatch.setattr(main, "rasa_client", RasaClient(base_url=stub.url))
+
+    with TestClient(main.app) as client:
+        data = client.post("/chat", json={"message": "fever", "sender_id": "s"}).json()
+    stub.stop()
+
+    assert [m["text"] for m in data["messages"]] == [
+        "stub reply to: fever", "stub reply to: fever (2)", "stub reply to: fever (3)"]
+    assert data["response"] == "\n\n".join(m["text"] for m in data["messages"])
+
+
+def test_stream_forwards_messages_then_done(monkeypatch):
+    stub = StubRasaServer(latency=0.2, messages_per_turn=2).start()
+    monkeypatch.setattr(main, "rasa_client", RasaClient(base_url=stub.url))
+
+    with TestClient(main.app) as client:
+        with client.stream("POST", "/chat/stream",
+                           json={"message": "fever", "sender_id": "s"}) as response:
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            events = [json.loads(line) for line in response.iter_lines() if line]
+    stub.stop()
+
+    assert [e["type"] for e in events] == ["message", "message", "done"]
+    assert events[1]["text"] == "stub reply to: fever (2)"
+    assert events[-1]["intent"] == "rasa_processed"
+
+
+def test_stream_falls_back_when_rasa_is_down(monkeypatch):
+    monkeypatch.setattr(main, "rasa_client", RasaClient(
+        base_url="http://127.0.0.1:9", connect_timeout=0.5))
+
+    with TestClient(main.app) as client:
+        with client.stream("POST", "/chat/stream",
+                           json={"message": "fever", "sender_id": "s"}) as response:
+            events = [json.loads(line) for line in response.iter_lines() if line]
+
+    assert events[0]["text"].startswith("For fever")
+    assert events[-1] == {"type": "done", "intent": "fallback", "language": "en"}
+
+
+def test_turn_is_kept_when_the_client_leaves_after_the_done_line(monkeypatch):
+    monkeypatch.setattr(main, "rasa_client", RasaClient(
+        base_url="http://127.0.0.1:9", connect_timeout=0.5))
+    logged = []
+
+    async def log_interaction(*args):
+        logged.append(args)
+
+    monkeypatch.setattr(main, "log_interaction", log_interaction)
+
+    async def scenario():
+        request = main.ChatRequest(message="fever", sender_id="stream_leaves")
+        http_request = Request({"type": "http", "client": ("127.0.0.1", 1), "headers": []})
+        response = await main.chat_stream(request, http_request)
+        async for chunk in response.body_iterator:
+            if json.loads(chunk)["type"] == "done":
+                break
+        # What Starlette does to the stream when the client disconnects
+        await response.body_iterator.aclose()
+        return await main.session_store.get("stream_leaves")
+
+    session = asyncio.run(scenario())
+    assert [args[0] for args in logged] == ["stream_leaves"]
+    assert session.turns[-1][0] == "fever"
+    assert session.slots["symptom"] == "fever"